@@ -3,10 +3,14 @@ from typing import Optional
 import bcrypt
 import jwt
 import os
+import time
 from dotenv import load_dotenv
 from fastapi import HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from db import db
+from cache import TTLCache
+import db
+import metrics
+from executor import BoundedExecutor
 from schemas import TokenData
 
 # Load environment variables
@@ -17,7 +21,39 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production"
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "10080"))
 
+# Users get "user"; promote moderators by setting role to "admin" on their users document
+DEFAULT_ROLE = "user"
+ADMIN_ROLE = "admin"
+
+# bcrypt runs for 100-300 ms per call, so it is kept off the event loop
+PASSWORD_POOL_KIND = os.getenv("PASSWORD_POOL_KIND", "thread")  # "thread" or "process"
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_POOL_MAX_CONCURRENCY = int(os.getenv("PASSWORD_POOL_MAX_CONCURRENCY", str(PASSWORD_POOL_WORKERS)))
+
+# Per-worker cache of decoded tokens and user records for get_current_user
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "300"))
+# Writes through set_user_role/delete_user evict only this worker's entry; other
+# workers notice a demoted or deleted admin when it expires, so keep admins short
+AUTH_ADMIN_CACHE_TTL_SECONDS = float(os.getenv("AUTH_ADMIN_CACHE_TTL_SECONDS", "30"))
+
 security = HTTPBearer()
+token_cache = TTLCache("auth_tokens", maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL_SECONDS)
+user_cache = TTLCache("auth_users", maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL_SECONDS)
+password_pool = BoundedExecutor(
+    "password",
+    kind=PASSWORD_POOL_KIND,
+    max_workers=PASSWORD_POOL_WORKERS,
+    max_concurrency=PASSWORD_POOL_MAX_CONCURRENCY,
+)
+
+PASSWORD_DURATION = metrics.Histogram(
+    "password_hash_duration_seconds", "bcrypt time per call, excluding pool queueing",
+    ("operation",),
+)
+metrics.register_stats("password_pool", password_pool.stats)
+metrics.register_stats("auth_token_cache", token_cache.stats)
+metrics.register_stats("auth_user_cache", user_cache.stats)
 
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt"""
@@ -29,6 +65,17 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+# Timed by the pool in this process; these functions may run in a child process
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the password worker pool"""
+    return await password_pool.run(hash_password, password, duration=PASSWORD_DURATION, labels=("hash",))
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the password worker pool"""
+    return await password_pool.run(
+        verify_password, plain_password, hashed_password, duration=PASSWORD_DURATION, labels=("verify",)
+    )
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a new access token"""
     to_encode = data.copy()
@@ -43,6 +90,9 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 
 def verify_token(token: str) -> TokenData:
     """Verify and decode a JWT token"""
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -53,6 +103,9 @@ def verify_token(token: str) -> TokenData:
                 headers={"WWW-Authenticate": "Bearer"},
             )
         token_data = TokenData(username=username)
+        # Never keep a token cached past its own expiry; one without exp gets the default TTL
+        expires = payload.get("exp")
+        token_cache.set(token, token_data, ttl=expires - time.time() if expires is not None else None)
         return token_data
     except jwt.PyJWTError:
         raise HTTPException(
@@ -63,9 +116,13 @@ def verify_token(token: str) -> TokenData:
 
 async def get_user_by_username(username: str):
     """Get user from database by username"""
-    user = await db.users.find_one({"username": username})
+    user = await db.db.users.find_one({"username": username})
     return user
 
+def invalidate_user(username: str):
+    """Drop a cached user record; call after any write to that user"""
+    user_cache.invalidate(username)
+
 async def create_user(username: str, password: str, email: Optional[str] = None):
     """Create a new user in the database"""
     existing_user = await get_user_by_username(username)
@@ -75,27 +132,40 @@ async def create_user(username: str, password: str, email: Optional[str] = None)
             detail="Username already registered"
         )
     
-    hashed_password = hash_password(password)
+    hashed_password = await hash_password_async(password)
     
     user_doc = {
         "username": username,
         "password_hash": hashed_password,
         "email": email,
+        "role": DEFAULT_ROLE,
         "created_at": datetime.utcnow()
     }
     
-    result = await db.users.insert_one(user_doc)
+    result = await db.db.users.insert_one(user_doc)
     
     user_doc["_id"] = str(result.inserted_id)
     del user_doc["password_hash"]
     return user_doc
 
+async def set_user_role(username: str, role: str) -> bool:
+    """Change a user's role; returns False if there is no such user"""
+    result = await db.db.users.update_one({"username": username}, {"$set": {"role": role}})
+    invalidate_user(username)
+    return result.matched_count > 0
+
+async def delete_user(username: str) -> bool:
+    """Delete a user; returns False if there is no such user"""
+    result = await db.db.users.delete_one({"username": username})
+    invalidate_user(username)
+    return result.deleted_count > 0
+
 async def authenticate_user(username: str, password: str):
     """Authenticate a user"""
     user = await get_user_by_username(username)
     if not user:
         return False
-    if not verify_password(password, user["password_hash"]):
+    if not await verify_password_async(password, user["password_hash"]):
         return False
     return user
 
@@ -104,14 +174,28 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     token = credentials.credentials
     token_data = verify_token(token)
     
-    user = await get_user_by_username(token_data.username)
+    user = user_cache.get(token_data.username)
     if user is None:
+        user = await get_user_by_username(token_data.username)
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        user["_id"] = str(user["_id"])
+        del user["password_hash"]
+        ttl = AUTH_ADMIN_CACHE_TTL_SECONDS if user.get("role") == ADMIN_ROLE else None
+        user_cache.set(token_data.username, user, ttl=ttl)
+    
+    # Hand out a copy so callers can't mutate the cached record
+    return dict(user)
+
+async def require_admin(current_user: dict = Depends(get_current_user)):
+    """Allow only users whose role is admin"""
+    if current_user.get("role") != ADMIN_ROLE:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin privileges required"
         )
-    
-    user["_id"] = str(user["_id"])
-    del user["password_hash"]
-    return user
+    return current_user
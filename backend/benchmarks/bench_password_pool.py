@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark event-loop latency during a burst of concurrent logins.
+
+Compares calling bcrypt inline on the loop against the bounded password pool.
+Prints one JSON object per mode.
+
+    python benchmarks/bench_password_pool.py --logins 32
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import auth
+from benchmarks.common import percentile
+
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float, samples: list):
+    """Sleep for `interval` repeatedly and record how late each wake-up is"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append((time.perf_counter() - start - interval) * 1000)
+
+
+async def login_inline(password: str, hashed: str):
+    return auth.verify_password(password, hashed)
+
+
+async def login_pooled(password: str, hashed: str):
+    return await auth.verify_password_async(password, hashed)
+
+
+async def run(mode: str, logins: int, interval: float) -> dict:
+    password = "benchmark-password"
+    hashed = auth.hash_password(password)
+    login = login_pooled if mode == "pool" else login_inline
+
+    samples: list = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(measure_loop_lag(stop, interval, samples))
+    await asyncio.sleep(interval * 2)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(login(password, hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await ticker
+    assert all(results)
+    return {
+        "mode": mode,
+        "logins": logins,
+        "elapsed_s": round(elapsed, 4),
+        "logins_per_s": round(logins / elapsed, 2),
+        "loop_lag_ms": {
+            "p50": round(statistics.median(samples), 3),
+            "p99": round(percentile(samples, 99), 3),
+            "max": round(max(samples), 3),
+        },
+        "pool": auth.password_pool.stats() if mode == "pool" else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=32)
+    parser.add_argument("--interval-ms", type=float, default=5.0)
+    parser.add_argument("--mode", choices=["inline", "pool", "both"], default="both")
+    args = parser.parse_args()
+
+    modes = ["inline", "pool"] if args.mode == "both" else [args.mode]
+    for mode in modes:
+        result = asyncio.run(run(mode, args.logins, args.interval_ms / 1000))
+        print(json.dumps(result))
+    auth.password_pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
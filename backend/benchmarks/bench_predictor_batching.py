@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark spam-predictor throughput for different micro-batch sizes.
+
+Fires concurrent predict requests through PredictionBatcher and compares
+against calling predictor.predict() one text at a time. Prints one JSON
+object per configuration.
+
+    python benchmarks/bench_predictor_batching.py --requests 2000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import make_texts, percentile
+from logics import predictor
+from logics.inference import PredictionBatcher
+
+
+def run_sequential(texts: list) -> dict:
+    latencies = []
+    started = time.perf_counter()
+    for text in texts:
+        t0 = time.perf_counter()
+        predictor.predict(text)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - started
+    return summarize("sequential", None, texts, elapsed, latencies)
+
+
+async def run_batched(texts: list, batch_size: int, wait_ms: float) -> dict:
+    batcher = PredictionBatcher(max_batch_size=batch_size, max_wait_ms=wait_ms)
+    latencies = []
+
+    async def one(text):
+        t0 = time.perf_counter()
+        await batcher.predict(text)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(text) for text in texts))
+    elapsed = time.perf_counter() - started
+    result = summarize("batched", batch_size, texts, elapsed, latencies)
+    result["avg_batch_size"] = round(batcher.stats()["avg_batch_size"], 2)
+    await batcher.close()
+    return result
+
+
+def summarize(mode, batch_size, texts, elapsed, latencies) -> dict:
+    return {
+        "mode": mode,
+        "batch_size": batch_size,
+        "requests": len(texts),
+        "elapsed_s": round(elapsed, 4),
+        "predictions_per_s": round(len(texts) / elapsed, 1),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p99": round(percentile(latencies, 99), 3),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--batch-sizes", default="1,8,32,128")
+    parser.add_argument("--wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    texts = make_texts(args.requests)
+    # Load the model up front so no configuration pays the lazy-load cost
+    predictor.warm_up()
+    print(json.dumps(run_sequential(texts)))
+    for batch_size in (int(size) for size in args.batch_sizes.split(",")):
+        print(json.dumps(asyncio.run(run_batched(texts, batch_size, args.wait_ms))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark complaint-listing serialization on synthetic Mongo documents.
+
+Compares the previous path (serialize_doc + jsonable_encoder + JSONResponse)
+with serialization.dumps (orjson, ObjectId/datetime handled in one pass).
+Prints one JSON object per path.
+
+    python benchmarks/bench_serialization.py --docs 10000
+"""
+
+import argparse
+import copy
+import json
+import os
+import statistics
+import sys
+import time
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+import schemas
+from benchmarks.common import make_complaint_docs
+from serialization import dumps
+
+
+def previous_path(docs: list) -> bytes:
+    complaints = [schemas.serialize_doc(doc) for doc in docs]
+    return JSONResponse(jsonable_encoder({"complaints": complaints})).body
+
+
+def orjson_path(docs: list) -> bytes:
+    return dumps({"complaints": docs})
+
+
+def run(name, func, docs, repeat) -> dict:
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        # serialize_doc mutates its input, so every run gets fresh documents
+        batch = copy.deepcopy(docs)
+        started = time.perf_counter()
+        size = len(func(batch))
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        "path": name,
+        "docs": len(docs),
+        "bytes": size,
+        "ms": {"median": round(statistics.median(timings), 2), "min": round(min(timings), 2)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    docs = make_complaint_docs(args.docs)
+    for name, func in (("previous", previous_path), ("orjson", orjson_path)):
+        print(json.dumps(run(name, func, docs, args.repeat)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Shared helpers for the benchmark scripts: synthetic data and latency summaries.
+"""
+
+import random
+import statistics
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+CATEGORIES = ["road", "water", "garbage", "streetlight", "drainage"]
+STATUSES = ["open", "in_progress", "resolved"]
+WORDS = (
+    "pothole road street light broken garbage overflow water leak drain "
+    "blocked near school hospital market sector park signal traffic urgent "
+    "buy cheap offer click free win prize"
+).split()
+
+
+def make_texts(count: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=rng.randint(5, 30))) for _ in range(count)]
+
+
+def make_complaint_docs(count: int, seed: int = 42) -> list:
+    """Synthetic complaint documents shaped like the ones raiseComplaint stores"""
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1)
+    docs = []
+    for _ in range(count):
+        created = start + timedelta(minutes=rng.randint(0, 500000))
+        docs.append({
+            # Unique id whose embedded timestamp matches created, as if inserted then
+            "_id": ObjectId(ObjectId.from_datetime(created).binary[:4] + ObjectId().binary[4:]),
+            "user_id": f"user{rng.randint(1, 500)}",
+            "upvote": [],
+            "upvote_count": rng.randint(0, 200),
+            "location": f"Sector {rng.randint(1, 60)}, Main Road",
+            "photo": [str(ObjectId()) for _ in range(rng.randint(0, 3))],
+            "category": rng.choice(CATEGORIES),
+            "description": " ".join(rng.choices(WORDS, k=rng.randint(8, 60))),
+            "flag": 1,
+            "status": rng.choice(STATUSES),
+            "geo": {"type": "Point", "coordinates": [77.5 + rng.random() * 0.3, 12.9 + rng.random() * 0.3]},
+            "created_at": created,
+        })
+    return docs
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def latency_summary(latencies_ms: list) -> dict:
+    """p50/p90/p99/max of a list of latencies in milliseconds"""
+    if not latencies_ms:
+        return {"p50": None, "p90": None, "p99": None, "max": None, "mean": None}
+    return {
+        "p50": round(percentile(latencies_ms, 50), 3),
+        "p90": round(percentile(latencies_ms, 90), 3),
+        "p99": round(percentile(latencies_ms, 99), 3),
+        "max": round(max(latencies_ms), 3),
+        "mean": round(statistics.fmean(latencies_ms), 3),
+    }
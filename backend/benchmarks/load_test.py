@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Seeded load test for the API: listing, creation, login and prediction.
+
+Seeds a dedicated database with synthetic complaints and users, drives each
+scenario with a fixed number of requests at a given concurrency, and prints
+throughput and latency percentiles as JSON so runs can be diffed between
+commits. Requires httpx; --stand-in additionally needs mongomock-motor.
+
+    # In-process app against a local MongoDB (database fundb_bench is wiped)
+    python benchmarks/load_test.py --complaints 20000 --users 200 --concurrency 32
+
+    # In-process app against an in-memory stand-in, no MongoDB needed
+    python benchmarks/load_test.py --stand-in --complaints 2000
+
+    # A running server (started with DATABASE_NAME=fundb_bench)
+    python benchmarks/load_test.py --base-url http://127.0.0.1:8000
+
+Login and prediction have no HTTP endpoint yet, so they are driven through
+auth.authenticate_user and the predictor batcher in-process, and skipped
+when --base-url is given. Scenarios the stand-in can't run faithfully are
+skipped with --stand-in. Exits non-zero if any scenario had errors.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+# Add the backend directory to the path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import common
+
+BENCH_PASSWORD = "benchmark-password"
+SCENARIOS = ["list", "list_summary", "create", "login", "predict"]
+SERVICE_SCENARIOS = {"login", "predict"}
+# mongomock-motor gaps that would make these fail or time a different code path
+STAND_IN_UNSUPPORTED = {
+    "list_summary": "the summary projection needs $substrCP, which mongomock lacks",
+    "create": "mongomock's bulk_write rejects pymongo's UpdateOne, so map counters aren't written",
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--complaints", type=int, default=10000, help="complaints to seed")
+    parser.add_argument("--users", type=int, default=100, help="users to seed")
+    parser.add_argument("--requests", type=int, default=1000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--database", default="fundb_bench", help="database to wipe and seed")
+    parser.add_argument("--stand-in", action="store_true", help="use mongomock-motor, not MongoDB")
+    parser.add_argument("--base-url", help="drive a running server instead of the in-process app")
+    parser.add_argument("--no-response-cache", action="store_true", help="disable the listing cache")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    return parser.parse_args()
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def seed(db, auth, args):
+    for collection in ("complaints", "users", "votes"):
+        await db.db[collection].drop()
+    await db.ensure_indexes()
+
+    docs = common.make_complaint_docs(args.complaints, seed=args.seed)
+    for start in range(0, len(docs), 1000):
+        await db.db["complaints"].insert_many(docs[start:start + 1000], ordered=False)
+
+    # One bcrypt hash shared by every user keeps seeding fast
+    password_hash = auth.hash_password(BENCH_PASSWORD)
+    users = [
+        {
+            "username": f"user{n}",
+            "password_hash": password_hash,
+            "email": f"user{n}@example.com",
+            "created_at": datetime.utcnow(),
+        }
+        for n in range(1, args.users + 1)
+    ]
+    if users:
+        await db.db["users"].insert_many(users, ordered=False)
+
+
+def make_operations(client, auth, inference, args):
+    texts = common.make_texts(1000, seed=args.seed)
+
+    async def list_page(rng):
+        params = {
+            "limit": 50,
+            "category": rng.choice(common.CATEGORIES),
+            "sort": rng.choice(["oldest", "newest", "most_upvoted"]),
+        }
+        response = await client.get("/api/complaints", params=params)
+        response.raise_for_status()
+
+    async def list_summary(rng):
+        params = {"limit": 50, "view": "summary", "status": rng.choice(common.STATUSES)}
+        response = await client.get("/api/complaints", params=params)
+        response.raise_for_status()
+
+    async def create(rng):
+        body = {
+            "user_id": f"user{rng.randint(1, max(1, args.users))}",
+            "photo": [],
+            "category": rng.choice(common.CATEGORIES),
+            "location": f"Sector {rng.randint(1, 60)}",
+            "description": rng.choice(texts),
+            "latitude": 12.9 + rng.random() * 0.3,
+            "longitude": 77.5 + rng.random() * 0.3,
+        }
+        response = await client.post("/api/complaints", json=body)
+        response.raise_for_status()
+
+    async def login(rng):
+        user = await auth.authenticate_user(f"user{rng.randint(1, args.users)}", BENCH_PASSWORD)
+        if not user:
+            raise RuntimeError("login failed")
+
+    async def predict(rng):
+        await inference.predict_async(rng.choice(texts))
+
+    return {
+        "list": list_page,
+        "list_summary": list_summary,
+        "create": create,
+        "login": login,
+        "predict": predict,
+    }
+
+
+async def run_scenario(operation, requests: int, concurrency: int, seed: int) -> dict:
+    latencies = []
+    errors = 0
+    first_error = None
+    issued = 0
+
+    async def worker(worker_id: int):
+        nonlocal errors, first_error, issued
+        rng = random.Random(seed * 1000 + worker_id)
+        while issued < requests:
+            issued += 1
+            started = time.perf_counter()
+            try:
+                await operation(rng)
+            except Exception as e:
+                errors += 1
+                first_error = first_error or f"{type(e).__name__}: {e}"
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else None,
+        "first_error": first_error,
+        "latency_ms": common.latency_summary(latencies),
+    }
+
+
+async def main_async(args) -> dict:
+    # db and http_cache read their settings at import, so configure first
+    os.environ["DATABASE_NAME"] = args.database
+    if args.no_response_cache:
+        os.environ["RESPONSE_CACHE_SIZE"] = "0"
+
+    import httpx
+    import auth
+    import db
+    import main
+    from logics import inference, predictor
+
+    if args.stand_in:
+        from mongomock_motor import AsyncMongoMockClient
+        db.use_client(AsyncMongoMockClient(), args.database)
+    else:
+        db.connect()
+
+    seed_started = time.perf_counter()
+    await seed(db, auth, args)
+    seed_seconds = time.perf_counter() - seed_started
+    predictor.warm_up()
+
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url, timeout=30)
+    else:
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=main.app), base_url="http://bench", timeout=30
+        )
+
+    operations = make_operations(client, auth, inference, args)
+    results = {}
+    async with client:
+        for name in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+            if name not in operations:
+                raise SystemExit(f"Unknown scenario: {name}")
+            if args.base_url and name in SERVICE_SCENARIOS:
+                results[name] = {"skipped": "no HTTP endpoint; run in-process to measure"}
+                continue
+            if args.stand_in and name in STAND_IN_UNSUPPORTED:
+                results[name] = {"skipped": f"not supported by the stand-in: {STAND_IN_UNSUPPORTED[name]}"}
+                continue
+            results[name] = await run_scenario(
+                operations[name], args.requests, args.concurrency, args.seed
+            )
+
+    await inference.batcher.close()
+    auth.password_pool.shutdown(wait=False)
+    return {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "target": args.base_url or "in-process",
+            "database": "stand-in" if args.stand_in else args.database,
+            "complaints": args.complaints,
+            "users": args.users,
+            "response_cache": not args.no_response_cache,
+            "seed_s": round(seed_seconds, 3),
+        },
+        "scenarios": results,
+    }
+
+
+def main():
+    args = parse_args()
+    report = asyncio.run(main_async(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    failed = [name for name, result in report["scenarios"].items() if result.get("errors")]
+    if failed:
+        sys.exit(f"❌ Errors in {', '.join(failed)}; see first_error in the report")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import os
+import zlib
+from typing import Optional
+from starlette.datastructures import MutableHeaders
+import metrics
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Responses smaller than this aren't worth the CPU or the extra headers
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+# Low qualities keep brotli cheaper than gzip -6 while still compressing better
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+# Images are already compressed and text/event-stream must reach the client unbuffered
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/msgpack",
+    "application/x-ndjson",
+    "text/plain",
+    "text/html",
+}
+
+COMPRESSED_BYTES = metrics.Counter(
+    "http_compression_bytes_total", "Response bytes before and after compression",
+    ("encoding", "stage"),
+)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick br or gzip from an Accept-Encoding header, preferring br on a tie"""
+    if not accept_encoding:
+        return None
+    quality = {}
+    for part in accept_encoding.split(","):
+        coding, *params = [piece.strip() for piece in part.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        quality[coding.lower()] = q
+    wildcard = quality.get("*", 0.0)
+    candidates = [("br", quality.get("br", wildcard))] if brotli is not None else []
+    candidates.append(("gzip", quality.get("gzip", wildcard)))
+    encoding, q = max(candidates, key=lambda candidate: candidate[1])
+    return encoding if q > 0 else None
+
+
+class _Compressor:
+    """Incremental gzip/brotli encoder that flushes after every chunk"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        COMPRESSED_BYTES.inc((self.encoding, "in"), len(data))
+        if self.encoding == "br":
+            out = self._brotli.process(data) + (self._brotli.finish() if final else self._brotli.flush())
+        else:
+            out = self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+        COMPRESSED_BYTES.inc((self.encoding, "out"), len(out))
+        return out
+
+
+class CompressionMiddleware:
+    """Compress compressible responses with brotli or gzip, per Accept-Encoding.
+
+    Whole responses below COMPRESSION_MIN_BYTES go out as they are. Streamed
+    responses (NDJSON exports) are compressed chunk by chunk with a flush after
+    each, so clients still receive rows as soon as they're produced.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = None
+        for key, value in scope.get("headers", []):
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                # Hold the headers until the first body chunk shows how big the response is
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            if passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=start_message.setdefault("headers", []))
+                content_type = headers.get("content-type", "").split(";")[0].strip()
+                if (
+                    start_message["status"] < 200 or start_message["status"] in (204, 206)
+                    or "content-encoding" in headers
+                    or content_type not in COMPRESSIBLE_TYPES
+                    or (not more_body and len(body) < COMPRESSION_MIN_BYTES)
+                ):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                compressor = _Compressor(encoding)
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                # Keep strong ETags distinct per encoding; http_cache strips the suffix
+                etag = headers.get("etag")
+                if etag and etag.endswith('"'):
+                    headers["etag"] = f'{etag[:-1]}-{encoding}"'
+                if more_body:
+                    del headers["content-length"]
+                    await send(start_message)
+                else:
+                    body = compressor.compress(body, final=True)
+                    headers["content-length"] = str(len(body))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+            await send({
+                "type": "http.response.body",
+                "body": compressor.compress(body, final=not more_body),
+                "more_body": more_body,
+            })
+
+        await self.app(scope, receive, send_compressed)
@@ -1,6 +1,10 @@
+import asyncio
+import time
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel, monitoring
 import os
 from dotenv import load_dotenv
+import metrics
 
 # Load environment variables
 load_dotenv()
@@ -9,13 +13,227 @@ load_dotenv()
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "fundb")
 
-client = AsyncIOMotorClient(MONGO_URL)
-db = client[DATABASE_NAME]
+# Connection pool tuning; size the pool per uvicorn worker
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "0")) or None
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "0")) or None
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "0")) or None
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")  # e.g. "zstd,zlib"
+READY_PING_TIMEOUT_SECONDS = float(os.getenv("READY_PING_TIMEOUT_SECONDS", "2"))
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """Connection pool counters for /ready, fed by pymongo's pool events"""
+
+    def __init__(self):
+        self.open = 0
+        self.checked_out = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.total_checkout_ms = 0.0
+        self.max_checkout_ms = 0.0
+        self.clears = 0
+
+    def connection_created(self, event):
+        self.open += 1
+
+    def connection_closed(self, event):
+        self.open -= 1
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+        self.checkouts += 1
+        # duration covers the wait for a free connection (pymongo >= 4.7)
+        duration_ms = (getattr(event, "duration", None) or 0.0) * 1000
+        self.total_checkout_ms += duration_ms
+        self.max_checkout_ms = max(self.max_checkout_ms, duration_ms)
+
+    def connection_checked_in(self, event):
+        self.checked_out -= 1
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failures += 1
+
+    def pool_cleared(self, event):
+        self.clears += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def snapshot(self) -> dict:
+        return {
+            "max_pool_size": MONGO_MAX_POOL_SIZE,
+            "open_connections": self.open,
+            "checked_out": self.checked_out,
+            "checkouts": self.checkouts,
+            "checkout_failures": self.checkout_failures,
+            "avg_checkout_ms": (self.total_checkout_ms / self.checkouts) if self.checkouts else 0.0,
+            "max_checkout_ms": self.max_checkout_ms,
+            "pool_clears": self.clears,
+        }
+
+
+class CommandTimer(monitoring.CommandListener):
+    """Feed per-command MongoDB latency into the /metrics histogram"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND_DURATION.observe((event.command_name, "ok"), event.duration_micros / 1e6)
+
+    def failed(self, event):
+        MONGO_COMMAND_DURATION.observe((event.command_name, "error"), event.duration_micros / 1e6)
+
+
+MONGO_COMMAND_DURATION = metrics.Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency by command and outcome",
+    ("command", "outcome"),
+)
+
+pool_stats = PoolStats()
+metrics.register_stats("mongo_pool", pool_stats.snapshot)
+
+# Created by connect() in the FastAPI lifespan (or on first use), closed by close().
+# Read them as db.client / db.db: module __getattr__ below connects lazily, so
+# "from db import db" in scripts still gets a usable database, never None.
+_client = None
+_db = None
+
+def connect():
+    """Create the shared Motor client; a no-op if one already exists"""
+    global _client, _db
+    if _client is None:
+        options = {
+            "maxPoolSize": MONGO_MAX_POOL_SIZE,
+            "minPoolSize": MONGO_MIN_POOL_SIZE,
+            "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+            "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+            "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+            "event_listeners": [pool_stats, CommandTimer()],
+        }
+        if MONGO_COMPRESSORS:
+            options["compressors"] = MONGO_COMPRESSORS
+        _client = AsyncIOMotorClient(MONGO_URL, **options)
+    _db = _client[DATABASE_NAME]
+    return _db
+
+def use_client(client, database_name: str = DATABASE_NAME):
+    """Install an already-built client (e.g. an in-memory stand-in) instead of connecting"""
+    global _client, _db
+    _client = client
+    _db = client[database_name]
+    return _db
+
+def close():
+    """Close the shared Motor client and its pooled connections"""
+    global _client, _db
+    if _client is not None:
+        _client.close()
+    _client = None
+    _db = None
+
+def __getattr__(name):
+    if name == "db":
+        return connect()
+    if name == "client":
+        connect()
+        return _client
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+async def ping() -> float:
+    """Round-trip a ping to MongoDB and return its latency in milliseconds"""
+    started = time.perf_counter()
+    connect()
+    await asyncio.wait_for(_client.admin.command("ping"), READY_PING_TIMEOUT_SECONDS)
+    return (time.perf_counter() - started) * 1000
+
+# Indexes the application relies on, as (collection, keys, options).
+# Listing filters put equality fields first and the _id sort/range key last.
+INDEXES = [
+    ("complaints", [("geo", "2dsphere")], {"name": "geo_2dsphere"}),
+    ("complaints", [("status", 1), ("_id", -1)], {"name": "status_id"}),
+    ("complaints", [("category", 1), ("_id", -1)], {"name": "category_id"}),
+    ("complaints", [("category", 1), ("status", 1), ("_id", -1)], {"name": "category_status_id"}),
+    ("complaints", [("user_id", 1), ("_id", -1)], {"name": "user_id_id"}),
+    ("complaints", [("upvote_count", -1), ("_id", -1)], {"name": "upvote_count_id"}),
+    # Duplicate check: recent complaints of one category in a handful of geohash cells
+    ("complaints", [("category", 1), ("geo_cell", 1), ("_id", -1)], {"name": "category_geo_cell_id"}),
+    # Full-text search; a category match counts more than a word in the description
+    ("complaints", [("description", "text"), ("category", "text")],
+     {"name": "description_category_text", "weights": {"description": 1, "category": 5}}),
+    # Pipeline sweep: complaints still waiting for (or stuck in) background processing
+    ("complaints", [("processing.state", 1), ("_id", 1)], {"name": "processing_state_id"}),
+    # Live feed polling fallback: status changes since the last poll
+    ("complaints", [("status_changed_at", 1)], {"name": "status_changed_at", "sparse": True}),
+    # Pipeline photos stage: a complaint's inline photos waiting to move to GridFS
+    ("photo_uploads", [("complaint_id", 1), ("index", 1)], {"name": "complaint_id_index"}),
+    # One vote per user per complaint, enforced by the database
+    ("votes", [("complaint_id", 1), ("user_id", 1)], {"name": "complaint_user_unique", "unique": True}),
+]
+
+def _same_keys(existing: dict, keys: list) -> bool:
+    """Compare an index_information() entry with declared keys"""
+    existing_keys = [tuple(key) for key in existing["key"]]
+    if any(direction == "text" for _field, direction in keys):
+        # The server stores text indexes as _fts/_ftsx with the fields in "weights"
+        return ("_fts", "text") in existing_keys and set(existing.get("weights", {})) == {
+            field for field, direction in keys if direction == "text"
+        }
+    return existing_keys == [tuple(key) for key in keys]
+
+# Create missing indexes and verify existing ones match their declaration.
+# Safe to run on every startup; mismatches are reported, never dropped.
+async def ensure_indexes():
+    report = {"created": [], "verified": [], "conflicts": []}
+    by_collection = {}
+    for collection, keys, options in INDEXES:
+        by_collection.setdefault(collection, []).append((keys, options))
+
+    for collection, declared in by_collection.items():
+        existing = await connect()[collection].index_information()
+        missing = []
+        for keys, options in declared:
+            name = f"{collection}.{options['name']}"
+            current = existing.get(options["name"])
+            if current is None:
+                missing.append(IndexModel(keys, **options))
+            elif not _same_keys(current, keys):
+                report["conflicts"].append(name)
+            else:
+                report["verified"].append(name)
+        if missing:
+            await connect()[collection].create_indexes(missing)
+            report["created"].extend(f"{collection}.{model.document['name']}" for model in missing)
+
+    for name in report["conflicts"]:
+        print(f"❌ Index {name} exists with different keys; drop it to let it be rebuilt")
+    if report["created"]:
+        print(f"✅ Created indexes: {', '.join(report['created'])}")
+    return report
 
 # Test connection
 async def test_db_connection():
     try:
-        await client.admin.command('ping')
+        connect()
+        await _client.admin.command('ping')
         print("✅ Successfully connected to MongoDB!")
         return True
     except Exception as e:
@@ -0,0 +1,62 @@
+import hashlib
+import os
+from typing import Any, Awaitable, Callable, Optional
+from fastapi import Request, Response
+import metrics
+from cache import TTLCache, collection_version
+from serialization import encode, wire_format
+
+# Bounded per-worker cache of rendered responses (JSON or MessagePack). Entries are keyed by the
+# collection's write counter, which only this worker's writes bump, so the TTL
+# caps how stale a response can be after a write handled by another worker.
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "30"))
+RESPONSE_CACHE_MAX_BODY_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BODY_BYTES", str(1024 * 1024)))
+
+response_cache = TTLCache("responses", maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL_SECONDS)
+metrics.register_stats("response_cache", response_cache.stats)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against a strong ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Compressed representations carry the same tag with an encoding suffix
+    tags = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in (strip_encoding_suffix(tag) for tag in tags)
+
+
+def strip_encoding_suffix(etag: str) -> str:
+    """Undo the "-gzip"/"-br" suffix CompressionMiddleware adds to an ETag"""
+    for suffix in ('-gzip"', '-br"'):
+        if etag.endswith(suffix):
+            return etag[: -len(suffix)] + '"'
+    return etag
+
+
+async def cached_json_response(
+    request: Request, collection: str, build: Callable[[], Awaitable[Any]]
+) -> Response:
+    """Serve a payload from cache with a strong ETag, building it only on a miss"""
+    # Read the version before building so a concurrent write can't be cached under it
+    key = (
+        request.url.path,
+        tuple(sorted(request.query_params.multi_items())),
+        collection_version(collection),
+        wire_format(),
+    )
+    entry = response_cache.get(key)
+    if entry is None:
+        body, media_type = encode(await build())
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        entry = (body, etag, media_type)
+        if len(body) <= RESPONSE_CACHE_MAX_BODY_BYTES:
+            response_cache.set(key, entry)
+
+    body, etag, media_type = entry
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=media_type, headers=headers)
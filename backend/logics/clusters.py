@@ -0,0 +1,188 @@
+import math
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterable, List, Tuple
+from pymongo import ReplaceOne, UpdateOne
+import db
+from logics import geo
+
+# Per-cell counters for every geohash precision up to the stored geo_cell's, so any
+# zoom level is answered from precomputed cells instead of scanning complaints
+CLUSTERS_COLLECTION = "complaint_clusters"
+# Written last by rebuild(); geohashes never contain "_", so it can't collide with a cell.
+# Bump CLUSTERS_VERSION to force a rebuild.
+BUILT_MARKER_ID = "_built"
+CLUSTERS_VERSION = 1
+BACKFILL_BATCH = 1000
+# Upper bound on cells returned for one bbox; coarser cells are used past it
+CLUSTER_MAX_CELLS = int(os.getenv("CLUSTER_MAX_CELLS", "1024"))
+
+# Web-map zoom level -> geohash precision; deeper zooms use the last entry (~150 m cells)
+ZOOM_PRECISION = [1, 1, 1, 2, 2, 2, 3, 3, 4, 4, 4, 5, 5, 6, 6, 6, 7]
+
+
+def precision_for_zoom(zoom: int) -> int:
+    return ZOOM_PRECISION[min(max(zoom, 0), len(ZOOM_PRECISION) - 1)]
+
+
+def parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    """Parse "min_lng,min_lat,max_lng,max_lat"; min_lng > max_lng crosses the antimeridian"""
+    try:
+        min_lng, min_lat, max_lng, max_lat = (float(part) for part in bbox.split(","))
+    except ValueError:
+        raise ValueError("bbox must be min_lng,min_lat,max_lng,max_lat")
+    if not (-180 <= min_lng <= 180 and -180 <= max_lng <= 180):
+        raise ValueError("bbox longitudes must be between -180 and 180")
+    if not (-90 <= min_lat <= max_lat <= 90):
+        raise ValueError("bbox latitudes must be between -90 and 90, min first")
+    return min_lng, min_lat, max_lng, max_lat
+
+
+def _axis_centers(low: float, high: float, step: float, origin: float) -> List[float]:
+    """Centers of the grid cells of size step (aligned to origin) overlapping [low, high]"""
+    first = math.floor((low - origin) / step)
+    last = min(math.floor((high - origin) / step), math.floor(-2 * origin / step) - 1)
+    return [origin + (index + 0.5) * step for index in range(first, last + 1)]
+
+
+def cells_in_bbox(bbox: Tuple[float, float, float, float], precision: int) -> List[str]:
+    """Geohash cells of one precision covering the bbox"""
+    min_lng, min_lat, max_lng, max_lat = bbox
+    lat_step, lng_step = geo.cell_size(precision)
+    spans = [(min_lng, max_lng)] if min_lng <= max_lng else [(min_lng, 180.0), (-180.0, max_lng)]
+    lats = _axis_centers(min_lat, max_lat, lat_step, -90.0)
+    cells = []
+    for low, high in spans:
+        for lng in _axis_centers(low, high, lng_step, -180.0):
+            cells.extend(geo.geohash_encode(lat, lng, precision) for lat in lats)
+    return cells
+
+
+def cell_count(bbox: Tuple[float, float, float, float], precision: int) -> int:
+    min_lng, min_lat, max_lng, max_lat = bbox
+    lat_step, lng_step = geo.cell_size(precision)
+    width = (max_lng - min_lng) if min_lng <= max_lng else (360.0 - min_lng + max_lng)
+    return (math.floor((max_lat - min_lat) / lat_step) + 2) * (math.floor(width / lng_step) + 2)
+
+
+async def _count(complaints: Iterable[dict], sign: int):
+    """Add (or with sign -1, remove) complaints to their cell at every precision, in one bulk write"""
+    increments = defaultdict(lambda: [0, 0.0, 0.0])
+    for complaint in complaints:
+        cell, point = complaint.get("geo_cell"), complaint.get("geo")
+        if not cell or not point:
+            continue
+        lng, lat = point["coordinates"]
+        for precision in range(1, len(cell) + 1):
+            totals = increments[cell[:precision]]
+            totals[0] += sign
+            totals[1] += sign * lat
+            totals[2] += sign * lng
+    if not increments:
+        return
+    await db.db[CLUSTERS_COLLECTION].bulk_write([
+        UpdateOne(
+            {"_id": cell},
+            {"$inc": {"count": count, "sum_lat": sum_lat, "sum_lng": sum_lng}},
+            upsert=True,
+        )
+        for cell, (count, sum_lat, sum_lng) in increments.items()
+    ], ordered=False)
+
+
+async def record_created(complaints: Iterable[dict]):
+    await _count(complaints, 1)
+
+
+async def record_removed(complaints: Iterable[dict]):
+    await _count(complaints, -1)
+
+
+async def backfill_geo_cells() -> int:
+    """Give complaints that have a point but no geo_cell (stored before it existed) their cell"""
+    updated = 0
+    batch = []
+    cursor = db.db["complaints"].find(
+        {"geo.coordinates": {"$exists": True}, "geo_cell": {"$not": {"$type": "string"}}},
+        {"geo": 1},
+    )
+    async for complaint in cursor:
+        coordinates = complaint["geo"].get("coordinates") or []
+        if len(coordinates) != 2:
+            continue
+        lng, lat = coordinates
+        cell = geo.geohash_encode(lat, lng, geo.GEO_CELL_PRECISION)
+        batch.append(UpdateOne({"_id": complaint["_id"]}, {"$set": {"geo_cell": cell}}))
+        if len(batch) >= BACKFILL_BATCH:
+            updated += (await db.db["complaints"].bulk_write(batch, ordered=False)).modified_count
+            batch = []
+    if batch:
+        updated += (await db.db["complaints"].bulk_write(batch, ordered=False)).modified_count
+    if updated:
+        print(f"✅ Backfilled geo_cell on {updated} complaints")
+    return updated
+
+
+async def rebuild() -> int:
+    """Recompute every cell from the complaints' geo_cell prefixes; returns the number of cells"""
+    await backfill_geo_cells()
+    requests = []
+    for precision in range(1, geo.GEO_CELL_PRECISION + 1):
+        cursor = db.db["complaints"].aggregate([
+            {"$match": {"geo_cell": {"$type": "string"}, "geo": {"$exists": True}}},
+            {"$group": {
+                "_id": {"$substrCP": ["$geo_cell", 0, precision]},
+                "count": {"$sum": 1},
+                "sum_lat": {"$sum": {"$arrayElemAt": ["$geo.coordinates", 1]}},
+                "sum_lng": {"$sum": {"$arrayElemAt": ["$geo.coordinates", 0]}},
+            }},
+        ])
+        async for cell in cursor:
+            requests.append(ReplaceOne({"_id": cell["_id"]}, cell, upsert=True))
+    await db.db[CLUSTERS_COLLECTION].delete_many({})
+    if requests:
+        await db.db[CLUSTERS_COLLECTION].bulk_write(requests, ordered=False)
+    await db.db[CLUSTERS_COLLECTION].replace_one(
+        {"_id": BUILT_MARKER_ID},
+        {"built_version": CLUSTERS_VERSION, "built_at": datetime.utcnow()},
+        upsert=True,
+    )
+    return len(requests)
+
+
+async def ensure_clusters():
+    """Build the cluster cells unless a complete build of this version exists.
+
+    Checking for the marker rather than for any cell means an empty database
+    isn't re-aggregated on every startup, and cells left by increments after
+    a failed build are replaced.
+    """
+    built = await db.db[CLUSTERS_COLLECTION].find_one({"_id": BUILT_MARKER_ID, "built_version": CLUSTERS_VERSION})
+    if built is None:
+        await rebuild()
+
+
+async def getclusters(bbox: Tuple[float, float, float, float], zoom: int) -> dict:
+    """Counts and centroids of the non-empty cells covering bbox at the zoom's precision"""
+    precision = precision_for_zoom(zoom)
+    # A huge bbox at a fine zoom would mean thousands of cells; step up to coarser ones
+    while precision > 1 and cell_count(bbox, precision) > CLUSTER_MAX_CELLS:
+        precision -= 1
+
+    clusters = []
+    cursor = db.db[CLUSTERS_COLLECTION].find({"_id": {"$in": cells_in_bbox(bbox, precision)}, "count": {"$gt": 0}})
+    async for cell in cursor:
+        clusters.append({
+            "cell": cell["_id"],
+            "count": cell["count"],
+            "latitude": cell["sum_lat"] / cell["count"],
+            "longitude": cell["sum_lng"] / cell["count"],
+        })
+    clusters.sort(key=lambda cluster: cluster["count"], reverse=True)
+    return {
+        "zoom": zoom,
+        "precision": precision,
+        "total": sum(cluster["count"] for cluster in clusters),
+        "clusters": clusters,
+    }
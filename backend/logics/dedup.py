@@ -0,0 +1,86 @@
+import asyncio
+import os
+from datetime import timedelta
+from typing import List, Optional
+from bson import ObjectId
+from pymongo import ReturnDocument
+import db
+from cache import bump_collection_version
+from logics import clusters, geo, predictor, stats
+
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() in ("1", "true", "yes")
+DEDUP_WINDOW_HOURS = float(os.getenv("DEDUP_WINDOW_HOURS", "72"))
+DEDUP_SIMILARITY_THRESHOLD = float(os.getenv("DEDUP_SIMILARITY_THRESHOLD", "0.75"))
+DEDUP_MAX_CANDIDATES = int(os.getenv("DEDUP_MAX_CANDIDATES", "20"))
+
+
+async def find_duplicate(complaint: dict) -> Optional[dict]:
+    """Find an earlier open complaint nearby, in the same category, with a similar description.
+
+    Candidates come from the (category, geo_cell, _id) index: the complaint's
+    geohash cell and its neighbours within the dedup window before it, newest
+    first. Only those few descriptions are compared in TF-IDF space.
+    """
+    point = complaint.get("geo")
+    if not DEDUP_ENABLED or not point:
+        return None
+
+    longitude, latitude = point["coordinates"]
+    cells = geo.geohash_with_neighbors(latitude, longitude, geo.GEO_CELL_PRECISION)
+    # Only earlier complaints, so two near-simultaneous reports can't merge into each other
+    created = complaint["_id"].generation_time
+    since = ObjectId.from_datetime(created - timedelta(hours=DEDUP_WINDOW_HOURS))
+    candidates = await (
+        db.db["complaints"]
+        .find(
+            {
+                "category": complaint.get("category"),
+                "geo_cell": {"$in": cells},
+                "_id": {"$gte": since, "$lt": complaint["_id"]},
+                "status": {"$ne": "resolved"},
+            },
+            {"description": 1},
+        )
+        .sort("_id", -1)
+        .limit(DEDUP_MAX_CANDIDATES)
+        .to_list(DEDUP_MAX_CANDIDATES)
+    )
+    if not candidates:
+        return None
+
+    # Vectorizing is CPU work (and may trigger the lazy model load), so keep it off the loop
+    scores: List[float] = await asyncio.to_thread(
+        predictor.similarity, complaint.get("description", ""), [c.get("description", "") for c in candidates]
+    )
+    best = max(range(len(scores)), key=scores.__getitem__)
+    if scores[best] < DEDUP_SIMILARITY_THRESHOLD:
+        return None
+    return {"_id": candidates[best]["_id"], "similarity": scores[best]}
+
+
+async def merge_duplicate(duplicate: dict, complaint: dict) -> Optional[dict]:
+    """Fold a stored report into an earlier complaint: attach its photos, count it, delete it.
+
+    Reports are unauthenticated, so they only bump duplicate_count; upvotes
+    stay one per signed-in account (see routers/upvotes.py).
+    """
+    update = {"$inc": {"duplicate_count": 1}}
+    if complaint.get("photo"):
+        update["$addToSet"] = {"photo": {"$each": complaint["photo"]}}
+    merged = await db.db["complaints"].find_one_and_update(
+        {"_id": duplicate["_id"]}, update, projection={"_id": 1}, return_document=ReturnDocument.AFTER
+    )
+    if merged is None:
+        # Deleted since we looked; keep the report as a complaint of its own
+        return None
+    await db.db["complaints"].delete_one({"_id": complaint["_id"]})
+    # Best effort, as at insert; stats.rebuild()/clusters.rebuild() repair any drift
+    results = await asyncio.gather(
+        stats.record_removed([complaint]), clusters.record_removed([complaint]), return_exceptions=True
+    )
+    for name, result in zip(("stats", "clusters"), results):
+        if isinstance(result, Exception):
+            print(f"❌ Failed to update complaint {name} counters: {result}")
+    bump_collection_version("complaints")
+    print(f"✅ Merged complaint {complaint['_id']} into {duplicate['_id']} (similarity {duplicate['similarity']:.2f})")
+    return merged
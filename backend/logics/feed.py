@@ -0,0 +1,200 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Optional, Set
+from bson import ObjectId
+from pymongo.errors import OperationFailure, PyMongoError
+import db
+import metrics
+from serialization import dumps
+
+# auto: change stream, falling back to polling on servers without one (standalone mongod)
+FEED_MODE = os.getenv("FEED_MODE", "auto")
+FEED_POLL_SECONDS = float(os.getenv("FEED_POLL_SECONDS", "2"))
+FEED_POLL_BATCH = int(os.getenv("FEED_POLL_BATCH", "500"))
+# Events buffered per client; a client that falls this far behind is disconnected
+FEED_CLIENT_QUEUE_SIZE = int(os.getenv("FEED_CLIENT_QUEUE_SIZE", "100"))
+FEED_HEARTBEAT_SECONDS = float(os.getenv("FEED_HEARTBEAT_SECONDS", "15"))
+# Backoff between change stream reconnects after errors such as a lost connection
+FEED_RETRY_MAX_SECONDS = float(os.getenv("FEED_RETRY_MAX_SECONDS", "30"))
+
+# Fields pushed for a new complaint, enough to render a dashboard card
+FEED_FIELDS = ["user_id", "category", "location", "status", "flag", "geo", "description", "photo", "upvote_count"]
+
+# Error code for "The $changeStream stage is only supported on replica sets"
+CHANGE_STREAM_UNSUPPORTED = 40573
+# The resume token fell off the oplog; the stream has to restart from now
+CHANGE_STREAM_HISTORY_LOST = 286
+
+
+def format_event(event: str, data: dict, event_id: Optional[str] = None) -> bytes:
+    """Encode one Server-Sent Event"""
+    head = f"id: {event_id}\n" if event_id else ""
+    return f"{head}event: {event}\n".encode() + b"data: " + dumps(data) + b"\n\n"
+
+
+HEARTBEAT = b": keep-alive\n\n"
+
+
+class ComplaintFeed:
+    """Fan complaint inserts and status changes out to SSE subscribers.
+
+    One source task per worker watches the collection (a change stream, or a
+    polling loop where change streams aren't available) and runs only while
+    someone is subscribed. Each event is encoded once and copied into every
+    subscriber's bounded queue, so a slow client can't hold up the others.
+    """
+
+    def __init__(self, queue_size: int = FEED_CLIENT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.mode = None
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._source: Optional[asyncio.Task] = None
+        self.events = 0
+        self.disconnected = 0
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(self.queue_size)
+        self._subscribers.add(queue)
+        if self._source is None or self._source.done():
+            self._source = asyncio.get_running_loop().create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+        if not self._subscribers and self._source is not None:
+            self._source.cancel()
+            self._source = None
+
+    def _end(self, queue: asyncio.Queue):
+        """Drop a subscriber's backlog and end its stream; EventSource reconnects"""
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+        self._subscribers.discard(queue)
+
+    def publish(self, message: bytes):
+        self.events += 1
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Too far behind; the client re-fetches the list when it reconnects
+                self._end(queue)
+                self.disconnected += 1
+
+    async def close(self):
+        """End every open stream and stop the source, e.g. on shutdown"""
+        for queue in list(self._subscribers):
+            self._end(queue)
+        if self._source is not None:
+            self._source.cancel()
+            self._source = None
+
+    async def _run(self):
+        try:
+            if FEED_MODE != "poll":
+                try:
+                    await self._watch()
+                except OperationFailure as e:
+                    if FEED_MODE != "auto" or e.code != CHANGE_STREAM_UNSUPPORTED:
+                        raise
+                    print("⚠️ Change streams need a replica set; polling for complaint events instead")
+            await self._poll()
+        except Exception as e:
+            # Don't leave subscribers on heartbeats alone; they reconnect and start a new source
+            print(f"❌ Complaint feed stopped: {e}")
+            for queue in list(self._subscribers):
+                self._end(queue)
+
+    async def _watch(self):
+        self.mode = "change_stream"
+        pipeline = [
+            {"$match": {"$or": [
+                {"operationType": "insert"},
+                {"operationType": "update", "updateDescription.updatedFields.status": {"$exists": True}},
+            ]}},
+            {"$project": {
+                "operationType": 1,
+                "documentKey": 1,
+                "updateDescription.updatedFields.status": 1,
+                # Inclusion keeps only the top-level _id, so name the document's own
+                "fullDocument._id": 1,
+                **{f"fullDocument.{field}": 1 for field in FEED_FIELDS},
+            }},
+        ]
+        resume_token = None
+        delay = 1.0
+        while True:
+            try:
+                async with db.db["complaints"].watch(pipeline, resume_after=resume_token) as stream:
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        delay = 1.0
+                        complaint_id = change["documentKey"]["_id"]
+                        if change["operationType"] == "insert":
+                            self.publish(format_event("complaint", change["fullDocument"], str(complaint_id)))
+                        else:
+                            status = change["updateDescription"]["updatedFields"]["status"]
+                            self.publish(format_event("status", {"_id": complaint_id, "status": status}))
+            except PyMongoError as e:
+                if isinstance(e, OperationFailure) and e.code == CHANGE_STREAM_UNSUPPORTED:
+                    raise  # no change streams on this server; let _run fall back to polling
+                if isinstance(e, OperationFailure) and e.code == CHANGE_STREAM_HISTORY_LOST:
+                    resume_token = None
+                # Connection failures, elections, ...: back off and reopen where we left off
+                print(f"❌ Complaint change stream failed, retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, FEED_RETRY_MAX_SECONDS)
+
+    async def _poll(self):
+        self.mode = "poll"
+        last_id = ObjectId.from_datetime(datetime.utcnow())
+        last_status_change = datetime.utcnow()
+        projection = {field: 1 for field in FEED_FIELDS}
+        while True:
+            try:
+                complaints = db.db["complaints"].find({"_id": {"$gt": last_id}}, projection)
+                async for complaint in complaints.sort("_id", 1).limit(FEED_POLL_BATCH):
+                    last_id = complaint["_id"]
+                    self.publish(format_event("complaint", complaint, str(last_id)))
+
+                changes = db.db["complaints"].find(
+                    {"status_changed_at": {"$gt": last_status_change}},
+                    {"status": 1, "status_changed_at": 1},
+                )
+                async for change in changes.sort("status_changed_at", 1).limit(FEED_POLL_BATCH):
+                    last_status_change = change["status_changed_at"]
+                    self.publish(format_event("status", {"_id": change["_id"], "status": change["status"]}))
+            except Exception as e:
+                print(f"❌ Complaint feed poll failed: {e}")
+            await asyncio.sleep(FEED_POLL_SECONDS)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "events": self.events,
+            "disconnected": self.disconnected,
+            "polling": 1 if self.mode == "poll" else 0,
+        }
+
+
+feed = ComplaintFeed()
+metrics.register_stats("complaint_feed", feed.stats)
+
+
+async def stream_events(queue: asyncio.Queue):
+    """Yield SSE bytes from one subscriber's queue, with heartbeats to keep proxies from timing out"""
+    try:
+        yield b"retry: 3000\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), FEED_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield HEARTBEAT
+                continue
+            if message is None:
+                return
+            yield message
+    finally:
+        feed.unsubscribe(queue)
@@ -0,0 +1,61 @@
+from typing import List, Tuple
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+# Precision of the geo_cell stored on complaints: about 150 m x 150 m
+GEO_CELL_PRECISION = 7
+
+
+def geohash_encode(latitude: float, longitude: float, precision: int) -> str:
+    """Encode a coordinate as a geohash of the given length"""
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_range[0] + lng_range[1]) / 2
+            if longitude >= mid:
+                value = (value << 1) | 1
+                lng_range[0] = mid
+            else:
+                value <<= 1
+                lng_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                value = (value << 1) | 1
+                lat_range[0] = mid
+            else:
+                value <<= 1
+                lat_range[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> Tuple[float, float]:
+    """(latitude, longitude) span in degrees of a geohash cell"""
+    lng_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def geohash_with_neighbors(latitude: float, longitude: float, precision: int) -> List[str]:
+    """The cell containing a point plus its eight neighbours, so border cases still match"""
+    lat_step, lng_step = cell_size(precision)
+    cells = []
+    for dlat in (-lat_step, 0.0, lat_step):
+        for dlng in (-lng_step, 0.0, lng_step):
+            lat = min(90.0, max(-90.0, latitude + dlat))
+            lng = (longitude + dlng + 180.0) % 360.0 - 180.0
+            cell = geohash_encode(lat, lng, precision)
+            if cell not in cells:
+                cells.append(cell)
+    return cells
@@ -1,6 +1,141 @@
+import base64
+import binascii
+import struct
 import schemas
 import db
-from typing import List
+from serialization import dumps
+from bson import ObjectId
+from bson.errors import InvalidId
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Search pages by offset; deep offsets make the text index scan further
+MAX_SEARCH_OFFSET = 1000
+SUMMARY_DESCRIPTION_LENGTH = 140
+
+# Fields a client may request with ?fields=; _id is always returned
+PROJECTABLE_FIELDS = set(schemas.complaintStored.model_fields)
+
+# Compact list item for ?view=summary: a card's fields, the first photo only and a
+# truncated description, computed by MongoDB so no full document leaves the server
+SUMMARY_PROJECTION = {
+    "user_id": 1,
+    "category": 1,
+    "location": 1,
+    "status": 1,
+    "flag": 1,
+    "geo": 1,
+    # Fall back to the legacy upvote array for documents without a counter; startup's
+    # backfill_upvote_counts makes this the stored value, which most_upvoted sorts on
+    "upvote_count": {"$ifNull": ["$upvote_count", {"$size": {"$ifNull": ["$upvote", []]}}]},
+    "description": {"$substrCP": ["$description", 0, SUMMARY_DESCRIPTION_LENGTH]},
+    "photo": {"$slice": ["$photo", 1]},
+}
+
+
+# Sort orders for listings; every one ends in _id so keyset cursors are unique
+SORTS = {
+    "oldest": [("_id", 1)],
+    "newest": [("_id", -1)],
+    "most_upvoted": [("upvote_count", -1), ("_id", -1)],
+}
+
+
+def encode_cursor(document: dict, sort: str = "oldest") -> str:
+    """Encode the sort key of the last document on a page as an opaque, URL-safe cursor"""
+    raw = ObjectId(document["_id"]).binary
+    if sort == "most_upvoted":
+        raw += struct.pack(">q", document.get("upvote_count", 0))
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str = "oldest") -> Tuple[ObjectId, Optional[int]]:
+    """Decode a page cursor back into the (_id, upvote_count) it points past"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii"))
+        if sort == "most_upvoted":
+            if len(raw) != 20:
+                raise ValueError
+            return ObjectId(raw[:12]), struct.unpack(">q", raw[12:])[0]
+        return ObjectId(raw), None
+    except (ValueError, TypeError, InvalidId, struct.error, binascii.Error):
+        raise ValueError("Invalid cursor")
+
+
+def _after(cursor: Optional[str], sort: str = "oldest") -> dict:
+    """Build the keyset filter for documents after the given cursor"""
+    if cursor is None:
+        return {}
+    last_id, last_count = decode_cursor(cursor, sort)
+    if sort == "newest":
+        return {"_id": {"$lt": last_id}}
+    if sort == "most_upvoted":
+        return {"$or": [
+            {"upvote_count": {"$lt": last_count}},
+            {"upvote_count": last_count, "_id": {"$lt": last_id}},
+        ]}
+    return {"_id": {"$gt": last_id}}
+
+
+def build_filter(
+    category: Optional[str] = None, status: Optional[str] = None,
+    user_id: Optional[str] = None, since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> dict:
+    """Build the MongoDB filter for the listing query parameters.
+
+    Time ranges are expressed on _id, whose ObjectId embeds the creation
+    time, so they share the indexes' trailing _id key with sorting.
+    """
+    query = {}
+    if category is not None:
+        query["category"] = category
+    if status is not None:
+        query["status"] = status
+    if user_id is not None:
+        query["user_id"] = user_id
+    created = {}
+    if since is not None:
+        created["$gte"] = ObjectId.from_datetime(since)
+    if until is not None:
+        created["$lt"] = ObjectId.from_datetime(until)
+    if created:
+        query["_id"] = created
+    return query
+
+
+def _combine(query: Optional[dict], after: dict) -> dict:
+    if not query:
+        return after
+    if not after:
+        return query
+    return {"$and": [query, after]}
+
+
+def _with_sort_keys(projection: Optional[dict], sort: str) -> Optional[dict]:
+    """Make sure the fields the cursor is built from survive the projection"""
+    if projection is None:
+        return None
+    for key, _direction in SORTS[sort]:
+        projection.setdefault(key, 1)
+    return projection
+
+
+def build_projection(fields: Optional[str] = None, view: str = "full") -> Optional[dict]:
+    """Turn the ?fields= / ?view= options into a MongoDB projection"""
+    if view == "summary":
+        return dict(SUMMARY_PROJECTION)
+    if not fields:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - PROJECTABLE_FIELDS
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return {field: 1 for field in requested}
+
 
 async def getcomplaints() -> List[dict]:
     """Retrieve all complaints from the database"""
@@ -9,3 +144,112 @@ async def getcomplaints() -> List[dict]:
     async for document in cursor:
         complaints.append(schemas.serialize_doc(document))
     return complaints
+
+
+async def getcomplaints_page(
+    limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+    projection: Optional[dict] = None, query: Optional[dict] = None,
+    sort: str = "oldest",
+) -> Tuple[List[dict], Optional[str]]:
+    """Retrieve one page of matching complaints, plus the cursor for the next page"""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    # Fetch one extra document to learn whether another page exists
+    documents = (
+        db.db["complaints"]
+        .find(_combine(query, _after(cursor, sort)), _with_sort_keys(projection, sort))
+        .sort(SORTS[sort])
+        .limit(limit + 1)
+    )
+    complaints = []
+    async for document in documents:
+        complaints.append(document)
+
+    next_cursor = None
+    if len(complaints) > limit:
+        complaints = complaints[:limit]
+        next_cursor = encode_cursor(complaints[-1], sort)
+    # Documents keep their ObjectIds; the response encoder stringifies them
+    return complaints, next_cursor
+
+
+def encode_offset(offset: int) -> str:
+    return base64.urlsafe_b64encode(struct.pack(">I", offset)).decode("ascii").rstrip("=")
+
+
+def decode_offset(cursor: Optional[str]) -> int:
+    if cursor is None:
+        return 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = struct.unpack(">I", base64.urlsafe_b64decode(padded.encode("ascii")))[0]
+    except (ValueError, TypeError, struct.error, binascii.Error):
+        raise ValueError("Invalid cursor")
+    if offset > MAX_SEARCH_OFFSET:
+        raise ValueError("Cursor is past the deepest searchable page")
+    return offset
+
+
+async def search_complaints(
+    text: str, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+    projection: Optional[dict] = None, query: Optional[dict] = None,
+) -> Tuple[List[dict], Optional[str]]:
+    """Full-text search over description and category, most relevant first"""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    offset = decode_offset(cursor)
+    score = {"$meta": "textScore"}
+    documents = (
+        db.db["complaints"]
+        .find({"$text": {"$search": text}, **(query or {})}, {**(projection or {}), "score": score})
+        .sort([("score", score), ("_id", -1)])
+        .skip(offset)
+        .limit(limit + 1)
+    )
+    complaints = []
+    async for document in documents:
+        complaints.append(document)
+
+    next_cursor = None
+    if len(complaints) > limit:
+        complaints = complaints[:limit]
+        if offset + limit <= MAX_SEARCH_OFFSET:
+            next_cursor = encode_offset(offset + limit)
+    return complaints, next_cursor
+
+
+async def getnearby(
+    latitude: float, longitude: float, radius_km: float, limit: int = DEFAULT_PAGE_SIZE,
+    projection: Optional[dict] = None,
+) -> List[dict]:
+    """Retrieve complaints within radius_km of a point, nearest first"""
+    pipeline = [
+        {
+            "$geoNear": {
+                "near": {"type": "Point", "coordinates": [longitude, latitude]},
+                "key": "geo",
+                "distanceField": "distance_m",
+                "maxDistance": radius_km * 1000,
+                "spherical": True,
+            }
+        },
+        {"$limit": max(1, min(limit, MAX_PAGE_SIZE))},
+    ]
+    if projection is not None:
+        pipeline.append({"$project": {**projection, "distance_m": 1}})
+    complaints = []
+    async for document in db.db["complaints"].aggregate(pipeline):
+        complaints.append(document)
+    return complaints
+
+
+async def stream_complaints(
+    cursor: Optional[str] = None, projection: Optional[dict] = None,
+    query: Optional[dict] = None, sort: str = "oldest",
+) -> AsyncIterator[bytes]:
+    """Yield complaints as NDJSON lines straight from the Motor cursor"""
+    documents = (
+        db.db["complaints"]
+        .find(_combine(query, _after(cursor, sort)), projection)
+        .sort(SORTS[sort])
+    )
+    async for document in documents:
+        yield dumps(document) + b"\n"
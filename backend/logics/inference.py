@@ -0,0 +1,111 @@
+import asyncio
+import os
+from typing import List, Optional, Tuple
+import metrics
+from executor import BoundedExecutor
+from logics import predictor
+
+PREDICTOR_BATCH_SIZE = int(os.getenv("PREDICTOR_BATCH_SIZE", "32"))
+PREDICTOR_BATCH_WAIT_MS = float(os.getenv("PREDICTOR_BATCH_WAIT_MS", "5"))
+
+
+class PredictionBatcher:
+    """Group concurrent predict requests into batches run on a worker thread.
+
+    A batch is flushed once it reaches max_batch_size or max_wait_ms has
+    passed since its first request, whichever comes first. While one batch
+    is being classified, new requests queue up and form the next one.
+    """
+
+    def __init__(self, max_batch_size: int = PREDICTOR_BATCH_SIZE,
+                 max_wait_ms: float = PREDICTOR_BATCH_WAIT_MS):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.executor = BoundedExecutor("predictor", max_workers=1)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.batches = 0
+        self.items = 0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def predict(self, text: str) -> Tuple[int, float]:
+        """Queue one text for classification and wait for its (label, confidence)"""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((text, future))
+        return await future
+
+    async def _collect(self) -> List[tuple]:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            # Skip callers that gave up while queued
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                continue
+            try:
+                results = await self.executor.run(
+                    predictor.predict_batch, [text for text, _ in batch]
+                )
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self.executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": (self.items / self.batches) if self.batches else 0.0,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "executor": self.executor.stats(),
+        }
+
+
+batcher = PredictionBatcher()
+metrics.register_stats("predictor_batcher", batcher.stats)
+
+
+async def predict_async(text: str) -> Tuple[int, float]:
+    """Classify text off the event loop via the shared batcher"""
+    return await batcher.predict(text)
@@ -0,0 +1,241 @@
+import asyncio
+import base64
+import binascii
+import hashlib
+import io
+import os
+import re
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+import db
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; without it photos are served without thumbnails
+    Image = None
+
+PHOTO_BUCKET = "photos"
+PHOTO_CHUNK_SIZE = 255 * 1024
+MAX_PHOTO_BYTES = int(os.getenv("MAX_PHOTO_BYTES", str(10 * 1024 * 1024)))
+THUMBNAIL_MAX_PX = int(os.getenv("THUMBNAIL_MAX_PX", "320"))
+
+# Inline data-URL photos wait here from submission until the pipeline's photos stage
+# moves them to GridFS, so their base64 is never stored in (or listed from) a complaint
+PHOTO_UPLOADS = "photo_uploads"
+
+DATA_URL_RE = re.compile(r"^data:(image/[\w.+-]+);base64,(.*)$", re.DOTALL)
+
+# Keep references to in-flight thumbnail tasks so they aren't garbage collected
+_thumbnail_tasks: Set[asyncio.Task] = set()
+
+
+class PhotoTooLarge(ValueError):
+    pass
+
+
+def photo_bucket() -> AsyncIOMotorGridFSBucket:
+    return AsyncIOMotorGridFSBucket(db.db, bucket_name=PHOTO_BUCKET)
+
+
+def parse_photo_id(photo_id: str) -> ObjectId:
+    try:
+        return ObjectId(photo_id)
+    except (InvalidId, TypeError):
+        raise ValueError("Invalid photo id")
+
+
+async def store_photo(
+    read: Callable[[int], Awaitable[bytes]], filename: str, content_type: str,
+    metadata: Optional[dict] = None,
+) -> ObjectId:
+    """Stream bytes from read() into GridFS chunk by chunk and return the file id"""
+    digest = hashlib.sha256()
+    size = 0
+    grid_in = photo_bucket().open_upload_stream(
+        filename,
+        chunk_size_bytes=PHOTO_CHUNK_SIZE,
+        metadata={"content_type": content_type, **(metadata or {})},
+    )
+    try:
+        while True:
+            chunk = await read(PHOTO_CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > MAX_PHOTO_BYTES:
+                raise PhotoTooLarge(f"Photo exceeds {MAX_PHOTO_BYTES} bytes")
+            digest.update(chunk)
+            await grid_in.write(chunk)
+        # Content hash doubles as a strong ETag for GET /api/photos/{id}
+        await grid_in.set("etag", digest.hexdigest())
+        await grid_in.close()
+    except BaseException:
+        await grid_in.abort()
+        raise
+    return grid_in._id
+
+
+def _bytes_reader(data: bytes) -> Callable[[int], Awaitable[bytes]]:
+    buffer = io.BytesIO(data)
+
+    async def read(size: int) -> bytes:
+        return buffer.read(size)
+
+    return read
+
+
+def check_data_url(data_url: str) -> Tuple[str, str]:
+    """Reject a data URL that isn't an image or is too large, without decoding it;
+    returns its (content_type, base64 payload)"""
+    match = DATA_URL_RE.match(data_url)
+    if match is None:
+        raise ValueError("Not an image data URL")
+    content_type, payload = match.groups()
+    if len(payload) * 3 // 4 > MAX_PHOTO_BYTES:
+        raise PhotoTooLarge(f"Photo exceeds {MAX_PHOTO_BYTES} bytes")
+    return content_type, payload
+
+
+async def store_data_url(data_url: str) -> str:
+    """Move an inline base64 data-URL image into GridFS and return its id"""
+    content_type, payload = check_data_url(data_url)
+    try:
+        data = base64.b64decode(payload, validate=True)
+    except binascii.Error:
+        raise ValueError("Invalid base64 photo data")
+    file_id = await store_photo(_bytes_reader(data), "upload", content_type)
+    schedule_thumbnail(file_id)
+    return str(file_id)
+
+
+def split_photo_refs(photos: list) -> Tuple[list, list]:
+    """Separate stored photo references from inline data URLs, checking the latter"""
+    refs, data_urls = [], []
+    for photo in photos:
+        if photo.startswith("data:"):
+            check_data_url(photo)
+            data_urls.append(photo)
+        else:
+            refs.append(photo)
+    return refs, data_urls
+
+
+async def stage_data_urls(staged: List[Tuple[ObjectId, List[str]]]):
+    """Park each complaint's inline photos, as (complaint_id, data_urls) pairs, for the pipeline"""
+    uploads = [
+        {"complaint_id": complaint_id, "index": index, "data_url": data_url}
+        for complaint_id, data_urls in staged
+        for index, data_url in enumerate(data_urls)
+    ]
+    if uploads:
+        await db.db[PHOTO_UPLOADS].insert_many(uploads, ordered=False)
+
+
+async def ingest_staged(complaint_id: ObjectId) -> List[str]:
+    """Move a complaint's staged photos into GridFS in submission order; returns the new ids.
+
+    Each id is added to the complaint before its upload is unstaged, so a retry
+    after a crash picks up where this left off instead of losing photos.
+    """
+    refs = []
+    uploads = db.db[PHOTO_UPLOADS].find({"complaint_id": complaint_id}).sort("index", 1)
+    async for upload in uploads:
+        try:
+            ref = await store_data_url(upload["data_url"])
+        except ValueError as e:
+            # Corrupt base64 won't get better on a retry; drop the photo
+            print(f"⚠️ Dropped an unreadable photo of complaint {complaint_id}: {e}")
+        else:
+            await db.db["complaints"].update_one({"_id": complaint_id}, {"$addToSet": {"photo": ref}})
+            refs.append(ref)
+        await db.db[PHOTO_UPLOADS].delete_one({"_id": upload["_id"]})
+    return refs
+
+
+def _make_thumbnail(data: bytes) -> Optional[bytes]:
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image = image.convert("RGB")
+            image.thumbnail((THUMBNAIL_MAX_PX, THUMBNAIL_MAX_PX))
+            out = io.BytesIO()
+            image.save(out, format="JPEG", quality=80, optimize=True)
+            return out.getvalue()
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+
+async def generate_thumbnail(file_id: ObjectId):
+    """Build a JPEG thumbnail for a stored photo and link it from the original"""
+    if Image is None:
+        return
+    grid_out = await photo_bucket().open_download_stream(file_id)
+    data = await grid_out.read()
+    # Resizing is CPU-bound, so keep it off the event loop
+    thumbnail = await asyncio.to_thread(_make_thumbnail, data)
+    if thumbnail is None:
+        return
+    thumbnail_id = await store_photo(
+        _bytes_reader(thumbnail), f"thumb-{file_id}.jpg", "image/jpeg",
+        metadata={"thumbnail_of": file_id},
+    )
+    await db.db[f"{PHOTO_BUCKET}.files"].update_one(
+        {"_id": file_id}, {"$set": {"metadata.thumbnail_id": thumbnail_id}}
+    )
+
+
+async def _run_thumbnail(file_id: ObjectId):
+    try:
+        await generate_thumbnail(file_id)
+    except Exception as e:
+        print(f"❌ Thumbnail generation failed for photo {file_id}: {e}")
+
+
+def schedule_thumbnail(file_id: ObjectId):
+    """Generate a thumbnail in the background without delaying the caller"""
+    task = asyncio.get_running_loop().create_task(_run_thumbnail(file_id))
+    _thumbnail_tasks.add(task)
+    task.add_done_callback(_thumbnail_tasks.discard)
+
+
+async def open_photo(photo_id: str, thumbnail: bool = False):
+    """Open a stored photo (or its thumbnail, once generated) for reading"""
+    bucket = photo_bucket()
+    grid_out = await bucket.open_download_stream(parse_photo_id(photo_id))
+    if thumbnail:
+        thumbnail_id = (grid_out.metadata or {}).get("thumbnail_id")
+        if thumbnail_id is not None:
+            grid_out = await bucket.open_download_stream(thumbnail_id)
+    return grid_out
+
+
+def parse_range(header: str, length: int) -> Tuple[int, int]:
+    """Parse a single 'bytes=' Range header into an inclusive (start, end) pair"""
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        raise ValueError("Unsupported range")
+    start_text, _, end_text = spec.strip().partition("-")
+    if start_text == "":
+        # Suffix range: the last N bytes
+        suffix = int(end_text)
+        if suffix <= 0:
+            raise ValueError("Unsatisfiable range")
+        return max(0, length - suffix), length - 1
+    start = int(start_text)
+    end = int(end_text) if end_text else length - 1
+    if start >= length or end < start:
+        raise ValueError("Unsatisfiable range")
+    return start, min(end, length - 1)
+
+
+async def iter_photo(grid_out, start: int, end: int):
+    """Yield the inclusive byte range [start, end] of a photo chunk by chunk"""
+    grid_out.seek(start)
+    remaining = end - start + 1
+    while remaining > 0:
+        chunk = await grid_out.read(min(PHOTO_CHUNK_SIZE, remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        yield chunk
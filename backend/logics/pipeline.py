@@ -0,0 +1,253 @@
+import asyncio
+import os
+import time
+import traceback
+from datetime import datetime, timedelta
+from typing import Optional
+from pymongo import ReturnDocument
+import db
+import metrics
+from cache import bump_collection_version
+from logics import dedup, inference, photos
+
+PIPELINE_ENABLED = os.getenv("PIPELINE_ENABLED", "true").lower() in ("1", "true", "yes")
+PIPELINE_WORKERS = int(os.getenv("PIPELINE_WORKERS", "4"))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "1000"))
+PIPELINE_MAX_ATTEMPTS = int(os.getenv("PIPELINE_MAX_ATTEMPTS", "3"))
+PIPELINE_RETRY_BASE_SECONDS = float(os.getenv("PIPELINE_RETRY_BASE_SECONDS", "2"))
+# A running complaint whose lease expires (worker crashed) is picked up again
+PIPELINE_LEASE_SECONDS = float(os.getenv("PIPELINE_LEASE_SECONDS", "60"))
+# How often to look for complaints the in-process queue missed (overflow, restarts, retries)
+PIPELINE_SWEEP_SECONDS = float(os.getenv("PIPELINE_SWEEP_SECONDS", "30"))
+PIPELINE_SWEEP_BATCH = int(os.getenv("PIPELINE_SWEEP_BATCH", "100"))
+
+DEAD_LETTERS = "complaint_dead_letters"
+
+STAGE_DURATION = metrics.Histogram(
+    "pipeline_stage_duration_seconds", "Background processing time per complaint stage", ("stage",),
+)
+PIPELINE_RESULTS = metrics.Counter(
+    "pipeline_complaints_total", "Complaints finished by the background pipeline by outcome", ("outcome",),
+)
+
+
+async def ingest_photos(complaint: dict) -> dict:
+    """Move the inline photos staged at submission into GridFS (decode, store, thumbnail)"""
+    refs = await photos.ingest_staged(complaint["_id"])
+    if not refs:
+        return {}
+    return {"photo": complaint.get("photo", []) + refs}
+
+
+async def merge_duplicates(complaint: dict) -> Optional[dict]:
+    """Fold the complaint into an earlier near-duplicate, if there is one"""
+    duplicate = await dedup.find_duplicate(complaint)
+    if duplicate is None or await dedup.merge_duplicate(duplicate, complaint) is None:
+        return {}
+    return None
+
+
+async def classify(complaint: dict) -> dict:
+    """Spam-classify the description and set flag from the predicted label"""
+    label, confidence = await inference.predict_async(complaint.get("description", ""))
+    return {"flag": label, "flag_confidence": confidence}
+
+
+# Stages run in order; each returns the fields to $set on the complaint, or None
+# when the complaint no longer exists (merged into a duplicate) and processing ends
+STAGES = [
+    ("photos", ingest_photos),
+    ("dedup", merge_duplicates),
+    ("classify", classify),
+]
+
+
+def _claimable(now: datetime) -> dict:
+    """Complaints due for processing: pending (and past any retry delay), or running with an expired lease"""
+    return {"$or": [
+        {"processing.state": "pending", "$or": [
+            {"processing.retry_at": {"$exists": False}},
+            {"processing.retry_at": {"$lte": now}},
+        ]},
+        {"processing.state": "running", "processing.lease_until": {"$lte": now}},
+    ]}
+
+
+class Pipeline:
+    """Process newly raised complaints on a pool of background workers.
+
+    Complaint ids are queued in process for low latency, but state lives on the
+    complaint itself, so a periodic sweep recovers anything the queue dropped:
+    overflow, restarts, scheduled retries and workers that died mid-stage.
+    Claims are atomic, so several app workers can share the same collection.
+    """
+
+    def __init__(self, workers: int = PIPELINE_WORKERS, queue_size: int = PIPELINE_QUEUE_SIZE):
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self.processed = 0
+        self.retried = 0
+        self.dead_lettered = 0
+        self.dropped = 0
+
+    def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(self.queue_size)
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._work()) for _ in range(self.workers)]
+        self._tasks.append(loop.create_task(self._sweep()))
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def enqueue(self, complaint_id):
+        """Hand a complaint to the workers; if they're saturated the sweep gets it later"""
+        if self._queue is None:
+            return
+        try:
+            self._queue.put_nowait(complaint_id)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    async def _work(self):
+        while True:
+            complaint_id = await self._queue.get()
+            try:
+                await self.process(complaint_id)
+            except Exception as e:
+                # Claiming or recording failed (e.g. database down); the sweep will retry
+                print(f"❌ Pipeline error for complaint {complaint_id}: {e}")
+
+    async def _sweep(self):
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"❌ Pipeline sweep failed: {e}")
+            await asyncio.sleep(PIPELINE_SWEEP_SECONDS)
+
+    async def sweep(self) -> int:
+        """Queue complaints that are due for processing but not already queued here"""
+        cursor = db.db["complaints"].find(
+            _claimable(datetime.utcnow()), {"_id": 1}
+        ).sort("_id", 1).limit(PIPELINE_SWEEP_BATCH)
+        queued = 0
+        async for doc in cursor:
+            self.enqueue(doc["_id"])
+            queued += 1
+        return queued
+
+    async def claim(self, complaint_id) -> Optional[dict]:
+        now = datetime.utcnow()
+        return await db.db["complaints"].find_one_and_update(
+            {"_id": complaint_id, **_claimable(now)},
+            {
+                "$set": {
+                    "processing.state": "running",
+                    "processing.lease_until": now + timedelta(seconds=PIPELINE_LEASE_SECONDS),
+                },
+                "$inc": {"processing.attempts": 1},
+            },
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def process(self, complaint_id) -> Optional[str]:
+        """Run every stage for one complaint; return its new processing state (or merged)"""
+        complaint = await self.claim(complaint_id)
+        if complaint is None:
+            return None  # already done, claimed by another worker, or waiting for a retry
+
+        updates = {}
+        timings = {"queued": (time.time() - complaint["_id"].generation_time.timestamp()) * 1000}
+        stage = None
+        try:
+            for stage, run in STAGES:
+                start = time.perf_counter()
+                result = await run({**complaint, **updates})
+                elapsed = time.perf_counter() - start
+                STAGE_DURATION.observe((stage,), elapsed)
+                timings[stage] = elapsed * 1000
+                if result is None:
+                    self.processed += 1
+                    PIPELINE_RESULTS.inc(("merged",))
+                    return "merged"
+                updates.update(result)
+        except Exception as e:
+            return await self._failed(complaint, stage, e, timings)
+
+        updates.update({
+            "processing.state": "done",
+            "processing.timings": timings,
+            "processing.finished_at": datetime.utcnow(),
+        })
+        await db.db["complaints"].update_one(
+            {"_id": complaint_id},
+            {"$set": updates, "$unset": {"processing.lease_until": "", "processing.retry_at": "", "processing.error": ""}},
+        )
+        bump_collection_version("complaints")
+        self.processed += 1
+        PIPELINE_RESULTS.inc(("done",))
+        return "done"
+
+    async def _failed(self, complaint: dict, stage: str, error: Exception, timings: dict) -> str:
+        attempts = complaint["processing"]["attempts"]
+        message = f"{stage}: {error}"
+        if attempts < PIPELINE_MAX_ATTEMPTS:
+            delay = PIPELINE_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+            await db.db["complaints"].update_one(
+                {"_id": complaint["_id"]},
+                {
+                    "$set": {
+                        "processing.state": "pending",
+                        "processing.retry_at": datetime.utcnow() + timedelta(seconds=delay),
+                        "processing.error": message,
+                    },
+                    "$unset": {"processing.lease_until": ""},
+                },
+            )
+            asyncio.get_running_loop().call_later(delay, self.enqueue, complaint["_id"])
+            self.retried += 1
+            PIPELINE_RESULTS.inc(("retried",))
+            return "pending"
+
+        # Out of attempts: park it and keep a record for inspection/replay
+        await db.db[DEAD_LETTERS].insert_one({
+            "complaint_id": complaint["_id"],
+            "stage": stage,
+            "error": message,
+            "traceback": "".join(traceback.format_exception(error)),
+            "attempts": attempts,
+            "timings": timings,
+            "failed_at": datetime.utcnow(),
+        })
+        await db.db["complaints"].update_one(
+            {"_id": complaint["_id"]},
+            {
+                "$set": {"processing.state": "failed", "processing.error": message},
+                "$unset": {"processing.lease_until": "", "processing.retry_at": ""},
+            },
+        )
+        self.dead_lettered += 1
+        PIPELINE_RESULTS.inc(("failed",))
+        return "failed"
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "processed": self.processed,
+            "retried": self.retried,
+            "dead_lettered": self.dead_lettered,
+            "dropped": self.dropped,
+        }
+
+
+pipeline = Pipeline()
+metrics.register_stats("pipeline", pipeline.stats)
@@ -1,22 +1,140 @@
 import joblib
 import os
+import metrics
+import threading
+import time
+from typing import List, Optional, Tuple
 
 # Path relative to this file
 current_dir = os.path.dirname(__file__)
 model_path = os.path.join(current_dir, "logreg_spam_model.joblib")
 
-# Load model and vectorizer
-vectorizer, model = joblib.load(model_path)
-def predict(text):
-    # Transform the text using the loaded vectorizer
-    features = vectorizer.transform([text])
-    
-    # Predict class
-    pred = model.predict(features)[0]
-    
-    # Get confidence
-    prob = model.predict_proba(features)[0].max()
-    
-    label = 1 if pred == 1 else 0
+# Retrained, versioned artifacts (see train_model.py); CURRENT names the one to serve
+PREDICTOR_MODEL_DIR = os.getenv("PREDICTOR_MODEL_DIR", os.path.join(current_dir, "models"))
+CURRENT_POINTER = "CURRENT"
+# How often each worker checks CURRENT for a newly published model (0 disables hot-swap)
+PREDICTOR_RELOAD_SECONDS = float(os.getenv("PREDICTOR_RELOAD_SECONDS", "30"))
+
+# "r" memory-maps the model's numpy arrays so worker processes share their pages
+PREDICTOR_MMAP_MODE = os.getenv("PREDICTOR_MMAP_MODE") or None
+# Load the model during startup instead of on the first prediction
+PREDICTOR_WARMUP = os.getenv("PREDICTOR_WARMUP", "false").lower() in ("1", "true", "yes")
+
+PREDICT_DURATION = metrics.Histogram(
+    "predictor_batch_duration_seconds", "Spam predictor time per vectorize+classify batch",
+)
+PREDICTED_TEXTS = metrics.Counter("predictor_texts_total", "Texts classified by the spam predictor")
+MODEL_LOADS = metrics.Counter("predictor_model_loads_total", "Spam model artifacts loaded, including hot swaps")
+
+_load_lock = threading.Lock()
+_loaded = None
+_loaded_version = None
+_next_check = 0.0
+
+
+def current_version() -> Optional[str]:
+    """Version named by the CURRENT pointer, or None to serve the bundled model"""
+    try:
+        with open(os.path.join(PREDICTOR_MODEL_DIR, CURRENT_POINTER)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def artifact_path(version: Optional[str]) -> str:
+    if version is None:
+        return model_path
+    return os.path.join(PREDICTOR_MODEL_DIR, f"{version}.joblib")
+
+
+def _load(version: Optional[str]):
+    global _loaded, _loaded_version
+    pair = tuple(joblib.load(artifact_path(version), mmap_mode=PREDICTOR_MMAP_MODE))
+    # One assignment swaps both halves, so a prediction never mixes two versions
+    _loaded, _loaded_version = pair, version
+    MODEL_LOADS.inc()
+    print(f"✅ Loaded spam model {version or 'bundled'}")
+
+
+def load_model():
+    """Return the (vectorizer, model) pair, loading it on first use and
+    swapping in a newly published version when CURRENT changes"""
+    global _next_check
+    if _loaded is not None and (PREDICTOR_RELOAD_SECONDS <= 0 or time.monotonic() < _next_check):
+        return _loaded
+    with _load_lock:
+        if _loaded is None or time.monotonic() >= _next_check:
+            _next_check = time.monotonic() + PREDICTOR_RELOAD_SECONDS
+            version = current_version()
+            if _loaded is None or version != _loaded_version:
+                try:
+                    _load(version)
+                except Exception as e:
+                    if _loaded is None:
+                        raise
+                    # Keep serving the old model rather than failing predictions
+                    print(f"❌ Failed to load spam model {version}: {e}")
+    return _loaded
+
+
+def reload_model():
+    """Load whatever CURRENT names now, instead of waiting for the next check"""
+    with _load_lock:
+        version = current_version()
+        if _loaded is None or version != _loaded_version:
+            _load(version)
+    return _loaded
+
+
+def model_version() -> Optional[str]:
+    return _loaded_version
+
+
+def warm_up():
+    """Load the model and run one prediction so the first request pays nothing"""
+    predict_batch(["warm up"])
+
+
+def __getattr__(name):
+    # Keep predictor.vectorizer / predictor.model working without loading at import
+    if name == "vectorizer":
+        return load_model()[0]
+    if name == "model":
+        return load_model()[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def predict_batch(texts: List[str]) -> List[Tuple[int, float]]:
+    """Classify many texts in one vectorizer/model pass, returning (label, confidence) pairs"""
+    if not texts:
+        return []
+    vectorizer, model = load_model()
+    with PREDICT_DURATION.time():
+        # Transform all texts at once using the loaded vectorizer
+        features = vectorizer.transform(texts)
+        
+        # One predict_proba call gives both the class and its confidence
+        probabilities = model.predict_proba(features)
+    PREDICTED_TEXTS.inc(amount=len(texts))
+    best = probabilities.argmax(axis=1)
     
+    results = []
+    for row, index in enumerate(best):
+        label = 1 if model.classes_[index] == 1 else 0
+        results.append((label, float(probabilities[row, index])))
+    return results
+
+
+def similarity(text: str, others: List[str]) -> List[float]:
+    """Cosine similarity of text to each of others in the model's TF-IDF space"""
+    if not others:
+        return []
+    vectorizer, _model = load_model()
+    vectors = vectorizer.transform([text] + others)
+    # TF-IDF rows are L2-normalised, so the dot product is the cosine
+    return (vectors[1:] @ vectors[0].T).toarray().ravel().tolist()
+
+
+def predict(text):
+    label, _confidence = predict_batch([text])[0]
     return label
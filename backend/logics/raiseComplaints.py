@@ -1,26 +1,96 @@
+import asyncio
 import schemas
 import db
+from cache import bump_collection_version
+from bson import ObjectId
+from logics import clusters, geo, photos, stats
+from logics.pipeline import pipeline
+from typing import List, Optional, Tuple
 
 
-async def raiseComplaint(complaint: schemas.raiseComplaint):
+def to_geo_point(latitude: Optional[float], longitude: Optional[float]) -> Optional[schemas.GeoPoint]:
+    """Build a GeoJSON point from a coordinate pair, if one was supplied"""
+    if latitude is None or longitude is None:
+        return None
+    return schemas.GeoPoint(coordinates=[longitude, latitude])
+
+
+def to_geo_cell(latitude: Optional[float], longitude: Optional[float]) -> Optional[str]:
+    """Geohash cell stored next to the point for cell-local lookups"""
+    if latitude is None or longitude is None:
+        return None
+    return geo.geohash_encode(latitude, longitude, geo.GEO_CELL_PRECISION)
+
+
+def build_complaint(complaint: schemas.raiseComplaint, photo_refs: list) -> dict:
+    """Build the document stored for a newly raised complaint"""
     # Convert the input complaint to a stored complaint
     stored_complaint = schemas.complaintStored(
         user_id=complaint.user_id,
         upvote=[],  # Initialize empty upvote list
         location=complaint.location,
-        photo=complaint.photo,
+        photo=photo_refs,  # GridFS ids, never inline image bytes
         category=complaint.category,
         description=complaint.description,
-        flag=True,  # Default value
-        status="open"  # Default value
+        flag=True,  # Until the pipeline's classify stage sets it
+        status="open",  # Default value
+        geo=to_geo_point(complaint.latitude, complaint.longitude),
+        geo_cell=to_geo_cell(complaint.latitude, complaint.longitude)
     )
     
-    # Convert to dict for storage
-    complaint_dict = stored_complaint.model_dump()
-    
-    # Store the complaint in MongoDB
-    result = await db.db["complaints"].insert_one(complaint_dict)
-    
-    # Return the created complaint with the new ID
-    created_complaint = await db.db["complaints"].find_one({"_id": result.inserted_id})
-    return schemas.serialize_doc(created_complaint)
\ No newline at end of file
+    # Convert to dict for storage; omit geo entirely so the 2dsphere index skips it
+    return stored_complaint.model_dump(exclude_none=True)
+
+
+async def record_counters(complaints: List[dict]):
+    """Update the dashboard and map counters for stored complaints, best effort.
+
+    The complaints are already saved, so a failure here must not fail the
+    request; the counters are repaired by stats.rebuild()/clusters.rebuild().
+    """
+    # Independent documents, so update them concurrently
+    results = await asyncio.gather(
+        stats.record_created(complaints), clusters.record_created(complaints), return_exceptions=True
+    )
+    for name, result in zip(("stats", "clusters"), results):
+        if isinstance(result, Exception):
+            print(f"❌ Failed to update complaint {name} counters: {result}")
+
+
+def prepare_complaint(complaint: schemas.raiseComplaint) -> Tuple[dict, List[str]]:
+    """Build the stored document with a fresh _id, plus its inline photos for the pipeline.
+
+    Only cheap checks happen here; decoding and storing photos and the
+    duplicate check are pipeline stages (see logics/pipeline.py).
+    """
+    photo_refs, data_urls = photos.split_photo_refs(complaint.photo)
+    complaint_dict = build_complaint(complaint, photo_refs)
+    complaint_dict["_id"] = ObjectId()
+    return complaint_dict, data_urls
+
+
+async def raiseComplaint(complaint: schemas.raiseComplaint):
+    complaint_dict, data_urls = prepare_complaint(complaint)
+    # Staged first, so the pipeline never claims the complaint before its photos are there
+    await photos.stage_data_urls([(complaint_dict["_id"], data_urls)])
+
+    # Store the complaint in MongoDB; the document we built is already the created complaint
+    await db.db["complaints"].insert_one(complaint_dict)
+    await record_counters([complaint_dict])
+    bump_collection_version("complaints")
+    # Photos, dedup and classification happen in the background; the response reports processing.state "pending"
+    pipeline.enqueue(complaint_dict["_id"])
+    return schemas.serialize_doc(complaint_dict)
+
+
+async def raiseComplaintsBatch(complaints: List[schemas.raiseComplaint]) -> List[dict]:
+    """Store several complaints with a single insert_many round trip"""
+    prepared = [prepare_complaint(complaint) for complaint in complaints]
+    complaint_dicts = [complaint_dict for complaint_dict, _data_urls in prepared]
+    await photos.stage_data_urls([(complaint_dict["_id"], data_urls) for complaint_dict, data_urls in prepared])
+    await db.db["complaints"].insert_many(complaint_dicts, ordered=False)
+    await record_counters(complaint_dicts)
+    bump_collection_version("complaints")
+    for doc in complaint_dicts:
+        pipeline.enqueue(doc["_id"])
+    return [schemas.serialize_doc(doc) for doc in complaint_dicts]
@@ -0,0 +1,126 @@
+import asyncio
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, Optional
+import db
+from cache import bump_collection_version
+
+# One document holds every dashboard counter, so reading stats is a single _id lookup
+STATS_COLLECTION = "complaint_stats"
+STATS_ID = "complaints"
+# Set only by rebuild(): a document created by an incremental upsert (e.g. after a
+# failed startup build) lacks it and holds partial totals. Bump to force a rebuild.
+STATS_VERSION = 1
+
+# This worker's background rebuild, so concurrent requests share one
+_rebuild_task: Optional[asyncio.Task] = None
+
+
+def _key(value) -> str:
+    """Make a category/status usable as a field name in an $inc path"""
+    return str(value if value is not None else "unknown").replace(".", "_").lstrip("$") or "unknown"
+
+
+async def _count(complaints: Iterable[dict], sign: int):
+    increments = Counter()
+    for complaint in complaints:
+        increments["total"] += sign
+        increments[f"by_status.{_key(complaint.get('status'))}"] += sign
+        increments[f"by_category.{_key(complaint.get('category'))}"] += sign
+    if increments:
+        await db.db[STATS_COLLECTION].update_one(
+            {"_id": STATS_ID},
+            {"$inc": dict(increments), "$set": {"updated_at": datetime.utcnow()}},
+            upsert=True,
+        )
+
+
+async def record_created(complaints: Iterable[dict]):
+    """Count newly inserted complaints with one $inc"""
+    await _count(complaints, 1)
+
+
+async def record_removed(complaints: Iterable[dict]):
+    """Take deleted complaints (e.g. merged duplicates) back out of the counters"""
+    await _count(complaints, -1)
+
+
+async def record_status_change(old_status, new_status):
+    """Move one complaint between status counters"""
+    if _key(old_status) == _key(new_status):
+        return
+    await db.db[STATS_COLLECTION].update_one(
+        {"_id": STATS_ID},
+        {
+            "$inc": {f"by_status.{_key(old_status)}": -1, f"by_status.{_key(new_status)}": 1},
+            "$set": {"updated_at": datetime.utcnow()},
+        },
+        upsert=True,
+    )
+
+
+async def rebuild() -> dict:
+    """Recompute every counter from the complaints collection and replace the stats document.
+
+    Increments that land while the aggregation runs are overwritten, so run this
+    on startup or from maintenance scripts rather than on the request path.
+    """
+    result = await db.db["complaints"].aggregate([
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "by_status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+            "by_category": [{"$group": {"_id": "$category", "count": {"$sum": 1}}}],
+        }},
+    ]).to_list(length=1)
+    facets = result[0] if result else {}
+    total = facets.get("total") or [{"count": 0}]
+    document = {
+        "_id": STATS_ID,
+        "total": total[0]["count"],
+        "by_status": {_key(row["_id"]): row["count"] for row in facets.get("by_status", [])},
+        "by_category": {_key(row["_id"]): row["count"] for row in facets.get("by_category", [])},
+        "updated_at": datetime.utcnow(),
+        "rebuilt_at": datetime.utcnow(),
+        "built_version": STATS_VERSION,
+    }
+    await db.db[STATS_COLLECTION].replace_one({"_id": STATS_ID}, document, upsert=True)
+    return document
+
+
+async def ensure_stats():
+    """Build the stats document unless a complete build of this version exists"""
+    built = await db.db[STATS_COLLECTION].find_one({"_id": STATS_ID, "built_version": STATS_VERSION}, {"_id": 1})
+    if built is None:
+        await rebuild()
+
+
+async def _rebuild_in_background():
+    try:
+        await rebuild()
+        # Responses cached from the partial document are stale now
+        bump_collection_version("complaints")
+    except Exception as e:
+        print(f"❌ Failed to rebuild complaint stats: {e}")
+
+
+def schedule_rebuild():
+    """Start a background rebuild unless this worker already has one running"""
+    global _rebuild_task
+    if _rebuild_task is None or _rebuild_task.done():
+        _rebuild_task = asyncio.get_running_loop().create_task(_rebuild_in_background())
+
+
+async def getstats() -> dict:
+    stats = await db.db[STATS_COLLECTION].find_one({"_id": STATS_ID}) or {}
+    complete = stats.get("built_version") == STATS_VERSION
+    if not complete:
+        # Missing, or only partial totals from increments since a failed build:
+        # serve what there is and rebuild off the request path
+        schedule_rebuild()
+    return {
+        "total": stats.get("total", 0),
+        "by_status": stats.get("by_status", {}),
+        "by_category": stats.get("by_category", {}),
+        "updated_at": stats.get("updated_at"),
+        "complete": complete,
+    }
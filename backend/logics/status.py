@@ -0,0 +1,34 @@
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+import db
+from cache import bump_collection_version
+from logics import stats
+from logics.upvotes import ComplaintNotFound
+
+
+async def updateStatus(complaint_id: str, status: str) -> dict:
+    """Change a complaint's status and move it between the dashboard status counters"""
+    try:
+        oid = ObjectId(complaint_id)
+    except (InvalidId, TypeError):
+        raise ComplaintNotFound(complaint_id)
+
+    # Returning the old document tells us which counter to decrement, atomically
+    previous = await db.db["complaints"].find_one_and_update(
+        {"_id": oid, "status": {"$ne": status}},
+        # status_changed_at lets the live feed's polling fallback find status changes
+        {"$set": {"status": status, "status_changed_at": datetime.utcnow()}},
+        projection={"status": 1},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if previous is None:
+        # Either missing or already in that status; the latter is a no-op
+        if await db.db["complaints"].find_one({"_id": oid}, {"_id": 1}) is None:
+            raise ComplaintNotFound(complaint_id)
+        return {"_id": complaint_id, "status": status, "changed": False}
+
+    await stats.record_status_change(previous.get("status"), status)
+    bump_collection_version("complaints")
+    return {"_id": complaint_id, "status": status, "changed": True}
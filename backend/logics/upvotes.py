@@ -0,0 +1,64 @@
+from datetime import datetime
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+import db
+from cache import bump_collection_version
+
+
+class ComplaintNotFound(LookupError):
+    pass
+
+
+async def backfill_upvote_counts() -> int:
+    """Give complaints stored before the counter existed an upvote_count from their upvote array.
+
+    Sorting and paging by most_upvoted filter on the stored field, so a
+    document without one would never come back after the first page.
+    """
+    result = await db.db["complaints"].update_many(
+        {"upvote_count": {"$exists": False}},
+        [{"$set": {"upvote_count": {"$size": {"$ifNull": ["$upvote", []]}}}}],
+    )
+    if result.modified_count:
+        print(f"✅ Backfilled upvote_count on {result.modified_count} complaints")
+    return result.modified_count
+
+
+async def upvoteComplaint(complaint_id: str, user_id: str) -> dict:
+    """Record one user's upvote and bump the complaint's denormalized counter.
+
+    Votes are rows in the votes collection (unique per complaint and user),
+    so the complaint document itself never grows; only its counter changes.
+    """
+    try:
+        oid = ObjectId(complaint_id)
+    except (InvalidId, TypeError):
+        raise ComplaintNotFound(complaint_id)
+
+    try:
+        await db.db["votes"].insert_one(
+            {"complaint_id": oid, "user_id": user_id, "created_at": datetime.utcnow()}
+        )
+    except DuplicateKeyError:
+        # Already voted: report the current count without touching the complaint
+        complaint = await db.db["complaints"].find_one({"_id": oid}, {"upvote_count": 1})
+        if complaint is None:
+            raise ComplaintNotFound(complaint_id)
+        return {"_id": complaint_id, "upvote_count": complaint.get("upvote_count", 0), "upvoted": False}
+
+    # A legacy complaint without a counter starts from its upvote array, not from 0
+    complaint = await db.db["complaints"].find_one_and_update(
+        {"_id": oid},
+        [{"$set": {"upvote_count": {"$add": [
+            {"$ifNull": ["$upvote_count", {"$size": {"$ifNull": ["$upvote", []]}}]}, 1,
+        ]}}}],
+        projection={"upvote_count": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    if complaint is None:
+        await db.db["votes"].delete_one({"complaint_id": oid, "user_id": user_id})
+        raise ComplaintNotFound(complaint_id)
+    bump_collection_version("complaints")
+    return {"_id": complaint_id, "upvote_count": complaint["upvote_count"], "upvoted": True}
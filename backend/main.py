@@ -1,13 +1,68 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routers import getComplaints, raiseComplaint, auth
+from fastapi.responses import PlainTextResponse
+from routers import getComplaints, raiseComplaint, auth, photos, upvotes, status
+from auth import password_pool
+from logics import clusters, predictor, stats
+from logics.inference import batcher
+from logics.feed import feed
+from logics.upvotes import backfill_upvote_counts
+from logics.pipeline import pipeline, PIPELINE_ENABLED
+from serialization import MongoJSONResponse, WireFormatMiddleware
+from compression import CompressionMiddleware
+import db
+import metrics
+import rate_limit
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    db.connect()
+    try:
+        await db.ensure_indexes()
+    except Exception as e:
+        print(f"❌ Failed to ensure MongoDB indexes: {e}")
+    try:
+        await backfill_upvote_counts()
+    except Exception as e:
+        print(f"❌ Failed to backfill upvote counts: {e}")
+    try:
+        await stats.ensure_stats()
+    except Exception as e:
+        print(f"❌ Failed to build complaint stats: {e}")
+    try:
+        await clusters.ensure_clusters()
+    except Exception as e:
+        print(f"❌ Failed to build complaint clusters: {e}")
+    if predictor.PREDICTOR_WARMUP:
+        await asyncio.to_thread(predictor.warm_up)
+    if PIPELINE_ENABLED:
+        pipeline.start()
+    yield
+    await feed.close()
+    await pipeline.close()
+    await batcher.close()
+    password_pool.shutdown(wait=False)
+    db.close()
+
 
 app = FastAPI(
     title="Civic Issue Reporting API",
     description="API for reporting and managing civic issues",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=MongoJSONResponse
 )
 
+# Innermost: pick JSON/MessagePack from Accept, then compress per Accept-Encoding
+app.add_middleware(WireFormatMiddleware)
+app.add_middleware(CompressionMiddleware)
+
+# Added before CORS so it runs inside it and 429s still carry CORS headers
+app.add_middleware(rate_limit.RateLimitMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -17,10 +72,16 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# Outermost, so recorded latency includes every other middleware
+app.add_middleware(metrics.MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router)  # Authentication routes
 app.include_router(getComplaints.router)
 app.include_router(raiseComplaint.router)
+app.include_router(photos.router)
+app.include_router(upvotes.router)
+app.include_router(status.router)
 
 @app.get("/")
 async def root():
@@ -29,3 +90,22 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "message": "API is running properly"}
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: fails with 503 when this worker can't reach MongoDB"""
+    try:
+        latency_ms = await db.ping()
+    except Exception as e:
+        return MongoJSONResponse(
+            {"status": "unavailable", "error": str(e) or type(e).__name__, "pool": db.pool_stats.snapshot()},
+            status_code=503,
+        )
+    return MongoJSONResponse(
+        {"status": "ready", "mongo_ping_ms": round(latency_ms, 3), "pool": db.pool_stats.snapshot()}
+    )
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,195 @@
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import metrics
+from serialization import dumps
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # redis is optional; only needed for RATE_LIMIT_REDIS_URL
+    redis = None
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+# Shared backend for multi-worker deployments; in-memory (per worker) when unset
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "")
+# Only trust X-Forwarded-For when running behind a proxy that sets it
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "false").lower() in ("1", "true", "yes")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+RATE_LIMITED = metrics.Counter(
+    "rate_limited_requests_total", "Requests rejected with 429 by rule and key scope", ("rule", "scope"),
+)
+
+
+def parse_limit(spec: str) -> Optional[Tuple[float, float]]:
+    """Parse "burst/seconds" (e.g. "10/60") into (capacity, tokens per second); "" disables"""
+    if not spec:
+        return None
+    capacity, _, period = spec.partition("/")
+    capacity, period = float(capacity), float(period or 1)
+    if capacity <= 0 or period <= 0:
+        raise ValueError(f"Invalid rate limit: {spec}")
+    return capacity, capacity / period
+
+
+# Token buckets per rule: (per-IP limit, per-user limit)
+LIMITS = {
+    "complaints": (
+        parse_limit(os.getenv("RATE_LIMIT_COMPLAINTS_PER_IP", "30/60")),
+        parse_limit(os.getenv("RATE_LIMIT_COMPLAINTS_PER_USER", "10/60")),
+    ),
+    "auth": (
+        parse_limit(os.getenv("RATE_LIMIT_AUTH_PER_IP", "10/60")),
+        None,
+    ),
+}
+
+# (method, path) -> rule; matched before routing, so rejected requests never reach a handler
+RULES = {
+    ("POST", "/api/complaints"): "complaints",
+    ("POST", "/api/complaints/batch"): "complaints",
+    ("POST", "/auth/login"): "auth",
+    ("POST", "/auth/signup"): "auth",
+}
+
+
+class MemoryBackend:
+    """Token buckets in this process, bounded by evicting the least recently used keys"""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> float:
+        """Spend cost tokens; return 0 if allowed, else seconds until enough have refilled"""
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        retry_after = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            retry_after = (cost - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+# Same algorithm as MemoryBackend, run atomically inside Redis
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local retry = 0
+if tokens >= cost then tokens = tokens - cost else retry = (cost - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(retry)
+"""
+
+
+class RedisBackend:
+    """Token buckets shared by every worker through Redis"""
+
+    def __init__(self, url: str):
+        if redis is None:
+            raise RuntimeError("RATE_LIMIT_REDIS_URL is set but the redis package is not installed")
+        self._client = redis.from_url(url)
+        self._take = self._client.register_script(_TAKE_SCRIPT)
+
+    async def take(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> float:
+        retry_after = await self._take(keys=[f"ratelimit:{key}"], args=[capacity, rate, time.time(), cost])
+        return float(retry_after)
+
+
+backend = RedisBackend(RATE_LIMIT_REDIS_URL) if RATE_LIMIT_REDIS_URL else MemoryBackend()
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def client_ip(scope) -> str:
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = _header(scope, b"x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+
+def client_user(scope) -> Optional[str]:
+    """Username from a valid bearer token, if any; cheap thanks to the token cache"""
+    authorization = _header(scope, b"authorization")
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    from auth import verify_token
+    try:
+        return verify_token(authorization[7:].strip()).username
+    except Exception:
+        return None
+
+
+async def check(rule: str, scope) -> Tuple[float, Optional[str]]:
+    """Take a token from every bucket the request falls in; return (retry_after, scope) if limited"""
+    per_ip, per_user = LIMITS[rule]
+    keys: List[Tuple[str, str, Tuple[float, float]]] = []
+    if per_ip is not None:
+        keys.append(("ip", f"{rule}:ip:{client_ip(scope)}", per_ip))
+    if per_user is not None:
+        user = client_user(scope)
+        if user is not None:
+            keys.append(("user", f"{rule}:user:{user}", per_user))
+    for key_scope, key, (capacity, rate) in keys:
+        retry_after = await backend.take(key, capacity, rate)
+        if retry_after > 0:
+            return retry_after, key_scope
+    return 0.0, None
+
+
+class RateLimitMiddleware:
+    """Reject over-limit requests with 429 before routing, body parsing, DB or bcrypt work"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        rule = RULES.get((scope.get("method"), scope.get("path"))) if scope["type"] == "http" else None
+        if rule is None or not RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            retry_after, key_scope = await check(rule, scope)
+        except Exception as e:
+            # Fail open: a broken shared backend shouldn't take the API down with it
+            print(f"❌ Rate limiter unavailable, allowing request: {e}")
+            retry_after = 0.0
+        if retry_after <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        RATE_LIMITED.inc((rule, key_scope))
+        body = dumps({"detail": "Too many requests"})
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -1,18 +1,35 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException
+import schemas
+from auth import delete_user, require_admin, set_user_role
+from serialization import MongoJSONResponse
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 @router.get("/health")
 async def auth_health():
     """Health check for auth router"""
-    return {"status": "Auth router is working"}
+    return MongoJSONResponse({"status": "Auth router is working"})
 
 @router.post("/signup")
 async def signup():
     """Placeholder signup endpoint"""
-    return {"message": "Signup endpoint"}
+    return MongoJSONResponse({"message": "Signup endpoint"})
 
 @router.post("/login")
 async def login():
     """Placeholder login endpoint"""
-    return {"message": "Login endpoint"}
+    return MongoJSONResponse({"message": "Login endpoint"})
+
+@router.patch("/users/{username}/role")
+async def update_user_role(username: str, update: schemas.roleUpdate, admin: dict = Depends(require_admin)):
+    """Promote or demote a user; takes effect at once in this worker"""
+    if not await set_user_role(username, update.role):
+        raise HTTPException(status_code=404, detail="User not found")
+    return MongoJSONResponse({"username": username, "role": update.role})
+
+@router.delete("/users/{username}")
+async def remove_user(username: str, admin: dict = Depends(require_admin)):
+    """Delete a user and drop their cached record"""
+    if not await delete_user(username):
+        raise HTTPException(status_code=404, detail="User not found")
+    return MongoJSONResponse({"username": username, "deleted": True})
@@ -1,5 +1,9 @@
-from fastapi import APIRouter, HTTPException
-from logics import getComplaints
+from datetime import datetime
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from http_cache import cached_json_response
+from logics import clusters, feed, getComplaints, stats
 
 
 router = APIRouter(
@@ -8,9 +12,128 @@ router = APIRouter(
 )
 
 @router.get("/complaints")
-async def list_complaints():
+async def list_complaints(
+    request: Request,
+    limit: int = Query(getComplaints.DEFAULT_PAGE_SIZE, ge=1, le=getComplaints.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    format: Literal["json", "ndjson"] = "json",
+    fields: Optional[str] = None,
+    view: Literal["full", "summary"] = "full",
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    user_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    sort: Literal["oldest", "newest", "most_upvoted"] = "oldest",
+):
     try:
-        complaints = await getComplaints.getcomplaints()
-        return {"complaints": complaints}
+        projection = getComplaints.build_projection(fields, view)
+        query = getComplaints.build_filter(category, status, user_id, since, until)
+        if format == "ndjson":
+            # Validate the cursor up front; errors inside the stream can't change the status
+            if cursor is not None:
+                getComplaints.decode_cursor(cursor, sort)
+            return StreamingResponse(
+                getComplaints.stream_complaints(cursor, projection, query, sort),
+                media_type="application/x-ndjson",
+            )
+
+        async def build():
+            complaints, next_cursor = await getComplaints.getcomplaints_page(
+                limit, cursor, projection, query, sort
+            )
+            return {"complaints": complaints, "next_cursor": next_cursor}
+
+        return await cached_json_response(request, "complaints", build)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/complaints/nearby")
+async def list_nearby_complaints(
+    request: Request,
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(5, gt=0, le=100),
+    limit: int = Query(getComplaints.DEFAULT_PAGE_SIZE, ge=1, le=getComplaints.MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    view: Literal["full", "summary"] = "full",
+):
+    try:
+        projection = getComplaints.build_projection(fields, view)
+
+        async def build():
+            complaints = await getComplaints.getnearby(lat, lng, radius_km, limit, projection)
+            return {"complaints": complaints}
+
+        return await cached_json_response(request, "complaints", build)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/complaints/search")
+async def search_complaints(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(getComplaints.DEFAULT_PAGE_SIZE, ge=1, le=getComplaints.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    view: Literal["full", "summary"] = "full",
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+):
+    try:
+        projection = getComplaints.build_projection(fields, view)
+        query = getComplaints.build_filter(category, status)
+        getComplaints.decode_offset(cursor)
+
+        async def build():
+            complaints, next_cursor = await getComplaints.search_complaints(
+                q, limit, cursor, projection, query
+            )
+            return {"complaints": complaints, "next_cursor": next_cursor}
+
+        return await cached_json_response(request, "complaints", build)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/complaints/stats")
+async def complaint_stats(request: Request):
+    try:
+        # One read of the materialized counters document, whatever the collection size
+        return await cached_json_response(request, "complaints", stats.getstats)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/complaints/stream")
+async def complaint_stream():
+    # Server-Sent Events: "complaint" for each new complaint, "status" for each status change
+    queue = feed.feed.subscribe()
+    return StreamingResponse(
+        feed.stream_events(queue),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/complaints/clusters")
+async def complaint_clusters(
+    request: Request,
+    bbox: str = Query(..., description="min_lng,min_lat,max_lng,max_lat"),
+    zoom: int = Query(..., ge=0, le=22),
+):
+    try:
+        box = clusters.parse_bbox(bbox)
+        return await cached_json_response(request, "complaints", lambda: clusters.getclusters(box, zoom))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
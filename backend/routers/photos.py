@@ -0,0 +1,71 @@
+from typing import Literal
+from fastapi import APIRouter, File, HTTPException, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from gridfs.errors import NoFile
+from http_cache import etag_matches
+from serialization import MongoJSONResponse
+from logics import photos
+
+
+router = APIRouter(
+    prefix="/api",
+    tags=["Photos"]
+)
+
+@router.post("/photos")
+async def upload_photo(file: UploadFile = File(...)):
+    if not (file.content_type or "").startswith("image/"):
+        raise HTTPException(status_code=415, detail="Only image uploads are supported")
+    try:
+        file_id = await photos.store_photo(file.read, file.filename or "upload", file.content_type)
+    except photos.PhotoTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    photos.schedule_thumbnail(file_id)
+    return MongoJSONResponse({
+        "id": file_id,
+        "url": f"/api/photos/{file_id}",
+        "thumbnail_url": f"/api/photos/{file_id}?size=thumb",
+    })
+
+@router.get("/photos/{photo_id}")
+async def get_photo(photo_id: str, request: Request, size: Literal["full", "thumb"] = "full"):
+    try:
+        grid_out = await photos.open_photo(photo_id, thumbnail=size == "thumb")
+    except (ValueError, NoFile):
+        raise HTTPException(status_code=404, detail="Photo not found")
+
+    etag = f'"{grid_out.etag}"'
+    # No thumbnail yet (or none possible): the original stands in, but mustn't be
+    # kept under the thumbnail URL once the real one exists
+    fallback = size == "thumb" and "thumbnail_of" not in (grid_out.metadata or {})
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        # Stored photos never change, so clients may keep them indefinitely
+        "Cache-Control": "no-cache" if fallback else "public, max-age=31536000, immutable",
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    length = grid_out.length
+    media_type = (grid_out.metadata or {}).get("content_type", "application/octet-stream")
+    start, end = 0, length - 1
+    status_code = 200
+    range_header = request.headers.get("range")
+    if range_header and length > 0:
+        try:
+            start, end = photos.parse_range(range_header, length)
+        except ValueError:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{length}"})
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{length}"
+    headers["Content-Length"] = str(end - start + 1 if length > 0 else 0)
+
+    return StreamingResponse(
+        photos.iter_photo(grid_out, start, end),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers,
+    )
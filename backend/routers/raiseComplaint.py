@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException
 import schemas
-from logics import getComplaints, raiseComplaints
+from serialization import MongoJSONResponse
+from logics import getComplaints, photos, raiseComplaints
 from typing import List
 
 
@@ -13,6 +14,23 @@ router = APIRouter(
 async def create_complaint(complaint: schemas.raiseComplaint):
     try:
         result = await raiseComplaints.raiseComplaint(complaint)
-        return result
+        return MongoJSONResponse(result)
+    except photos.PhotoTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/complaints/batch", response_model=dict)
+async def create_complaints_batch(batch: schemas.raiseComplaintBatch):
+    try:
+        results = await raiseComplaints.raiseComplaintsBatch(batch.complaints)
+        return MongoJSONResponse({"complaints": results})
+    except photos.PhotoTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
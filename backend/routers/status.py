@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, HTTPException
+import schemas
+from auth import require_admin
+from serialization import MongoJSONResponse
+from logics import status
+from logics.upvotes import ComplaintNotFound
+
+
+router = APIRouter(
+    prefix="/api",
+    tags=["Complaint Status"]
+)
+
+@router.patch("/complaints/{complaint_id}/status")
+async def update_complaint_status(
+    complaint_id: str, update: schemas.statusUpdate, admin: dict = Depends(require_admin)
+):
+    try:
+        return MongoJSONResponse(await status.updateStatus(complaint_id, update.status))
+    except ComplaintNotFound:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends, HTTPException
+from auth import get_current_user
+from serialization import MongoJSONResponse
+from logics import upvotes
+
+
+router = APIRouter(
+    prefix="/api",
+    tags=["Upvotes"]
+)
+
+@router.post("/complaints/{complaint_id}/upvote")
+async def upvote_complaint(complaint_id: str, current_user: dict = Depends(get_current_user)):
+    # The voter is whoever the token belongs to, so one account gets one vote
+    try:
+        return MongoJSONResponse(await upvotes.upvoteComplaint(complaint_id, current_user["_id"]))
+    except upvotes.ComplaintNotFound:
+        raise HTTPException(status_code=404, detail="Complaint not found")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
 from datetime import datetime
 
 # Authentication Schemas
@@ -25,6 +25,9 @@ class UserResponse(BaseModel):
     email: Optional[str] = None  # Made email optional
     created_at: datetime
 
+class roleUpdate(BaseModel):
+    role: Literal["user", "admin"]
+
 # Existing Schemas
 class UserCreate(BaseModel):
     username: str  # Fixed typo: was "uername"
@@ -32,22 +35,48 @@ class UserCreate(BaseModel):
     email: str
     location: str
 
+class GeoPoint(BaseModel):
+    type: str = "Point"
+    coordinates: list[float]  # GeoJSON order: [longitude, latitude]
+
 class raiseComplaint(BaseModel):
     user_id: str = "Anonymous"
-    photo: list[str]
+    photo: list[str]  # photo ids from POST /api/photos, or inline data URLs (moved to GridFS)
     category: str
     location: str
     description: str
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+
+class raiseComplaintBatch(BaseModel):
+    complaints: list[raiseComplaint] = Field(..., min_length=1, max_length=100)
+
+class statusUpdate(BaseModel):
+    status: str = Field(..., min_length=1, max_length=50)  # e.g. "open", "in progress", "resolved"
+
+# Post-submission processing, advanced by logics.pipeline
+class processingState(BaseModel):
+    state: str = "pending"  # pending -> running -> done | failed
+    attempts: int = 0
+    retry_at: Optional[datetime] = None
+    lease_until: Optional[datetime] = None
+    timings: dict = {}  # stage -> milliseconds
+    error: Optional[str] = None
 
 class complaintStored(BaseModel):
     user_id: str = "Anonymous"
-    upvote: list[int]
+    upvote: list[int]  # legacy; votes now live in the votes collection
+    upvote_count: int = 0
     location: str
     photo: list[str]
     category: str
     description: str
     flag: int = 1
     status: str = "open"
+    geo: Optional[GeoPoint] = None
+    geo_cell: Optional[str] = None  # geohash of geo, for cell-local lookups
+    duplicate_count: int = 0  # reports merged into this one
+    processing: processingState = processingState()
 
 # Helper to convert ObjectId to string
 def serialize_doc(doc):
@@ -0,0 +1,124 @@
+from contextvars import ContextVar
+from datetime import date, datetime
+from typing import Any, Optional, Tuple
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; without it every response is JSON
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+# Representation picked for the current request by WireFormatMiddleware
+_wire_format: ContextVar[str] = ContextVar("wire_format", default=JSON_MEDIA_TYPE)
+
+
+def _default(obj: Any) -> Any:
+    # orjson calls this only for types it can't encode itself (datetime, dict,
+    # list, str, ... are native), so documents are encoded in a single pass
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _msgpack_default(obj: Any) -> Any:
+    # Same shapes as the JSON encoding, so clients can switch formats freely
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    return _default(obj)
+
+
+def dumps(content: Any) -> bytes:
+    """Encode raw Mongo documents (ObjectId, datetime, ...) straight to JSON bytes"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def packb(content: Any) -> bytes:
+    """Encode raw Mongo documents as MessagePack"""
+    return msgpack.packb(content, default=_msgpack_default, use_bin_type=True, datetime=False)
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Pick JSON or MessagePack from an Accept header; JSON unless MessagePack is preferred"""
+    if not accept or msgpack is None:
+        return JSON_MEDIA_TYPE
+    quality = {}
+    for part in accept.split(","):
+        media_type, *params = [piece.strip() for piece in part.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        quality[media_type.lower()] = max(q, quality.get(media_type.lower(), 0.0))
+    msgpack_q = max(quality.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES)
+    json_q = max(quality.get(JSON_MEDIA_TYPE, 0.0), quality.get("application/*", 0.0), quality.get("*/*", 0.0))
+    return MSGPACK_MEDIA_TYPE if msgpack_q > 0 and msgpack_q >= json_q else JSON_MEDIA_TYPE
+
+
+def wire_format() -> str:
+    return _wire_format.get()
+
+
+def encode(content: Any) -> Tuple[bytes, str]:
+    """Encode content in the current request's negotiated format, returning (body, media type)"""
+    if wire_format() == MSGPACK_MEDIA_TYPE:
+        return packb(content), MSGPACK_MEDIA_TYPE
+    return dumps(content), JSON_MEDIA_TYPE
+
+
+class MongoJSONResponse(JSONResponse):
+    """JSON response that encodes Mongo documents with orjson, without jsonable_encoder.
+
+    Route handlers should return an instance directly: returning a plain dict
+    makes FastAPI walk it with jsonable_encoder before this class sees it.
+    Clients that prefer MessagePack in Accept get that encoding instead.
+    """
+
+    def render(self, content: Any) -> bytes:
+        # Runs before the headers are built, so the negotiated media type is used
+        body, self.media_type = encode(content)
+        return body
+
+
+class WireFormatMiddleware:
+    """Negotiate the response representation from Accept for the rest of the request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or msgpack is None:
+            await self.app(scope, receive, send)
+            return
+
+        accept = None
+        for key, value in scope.get("headers", []):
+            if key == b"accept":
+                accept = value.decode("latin-1")
+                break
+
+        async def send_with_vary(message):
+            # Every negotiable response varies on Accept, whichever format was chosen
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers", []))
+                content_type = headers.get(b"content-type", b"").split(b";")[0].decode("latin-1")
+                if content_type in (JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE):
+                    message["headers"] = list(message.get("headers", [])) + [(b"vary", b"Accept")]
+            await send(message)
+
+        token = _wire_format.set(negotiate(accept))
+        try:
+            await self.app(scope, receive, send_with_vary)
+        finally:
+            _wire_format.reset(token)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Retrain the spam model from labeled complaints without loading them all at once.
+
+Complaints are streamed from MongoDB in batches. A HashingVectorizer (stateless,
+so it needs no vocabulary pass) turns each batch into features, and an
+SGDClassifier with logistic loss learns from it via partial_fit. Memory stays
+bounded by --batch-size however large the collection grows.
+
+Every complaint whose --label-field is 0 or 1 is used. By default 1 marks
+spam; with --label-means valid the field follows the flag convention instead.
+Either way the model learns the predictor's labels, which the pipeline stores
+as flag: 1 is a valid complaint, 0 is spam. About --holdout of them (chosen by
+_id, so the same ones every epoch) are kept out of training and scored afterwards.
+
+The result is written to PREDICTOR_MODEL_DIR as <version>.joblib, in the same
+(vectorizer, model) format as the bundled model, plus <version>.json with the
+metrics. Unless --no-publish is given, the CURRENT pointer is then switched to
+it, and running workers hot-swap within PREDICTOR_RELOAD_SECONDS. A model that
+disagrees with the one being served on most of PROBE_TEXTS (a sign of inverted
+labels) is saved but not published.
+
+    python train_model.py --label-field spam_label --epochs 3
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timezone
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.linear_model import SGDClassifier
+import db
+from logics import predictor
+
+CLASSES = np.array([0, 1])
+
+# Unambiguous texts for the pre-publish polarity check, served model as the reference
+PROBE_TEXTS = [
+    "There is a large pothole on the main road near the school",
+    "Streetlight not working on 5th cross since three days",
+    "Garbage has not been collected in our street for a week",
+    "Water pipe burst and flooding the lane",
+    "Win free money now, click here and subscribe",
+    "Cheap loans, call now to claim your prize",
+    "Subscribe to my channel for free gifts and followers",
+    "Earn 5000 dollars a day from home, limited offer",
+]
+
+
+def make_vectorizer(n_features: int) -> HashingVectorizer:
+    # l2-normalised rows keep predictor.similarity()'s dot product a cosine
+    return HashingVectorizer(
+        n_features=n_features, ngram_range=(1, 2), alternate_sign=False, norm="l2",
+        lowercase=True, stop_words="english",
+    )
+
+
+def is_holdout(complaint_id, fraction: float) -> bool:
+    # The ObjectId's trailing bytes are an incrementing counter, so the modulo spreads evenly
+    return fraction > 0 and (int(str(complaint_id)[-6:], 16) % 1000) < fraction * 1000
+
+
+async def stream_batches(label_field: str, batch_size: int, label_means: str = "spam"):
+    """Yield (ids, texts, labels) lists of up to batch_size labeled complaints.
+
+    Labels are in the predictor's convention (1 valid, 0 spam) whatever the field uses.
+    """
+    cursor = db.db["complaints"].find(
+        {label_field: {"$in": [0, 1, True, False]}, "description": {"$type": "string"}},
+        {"description": 1, label_field: 1},
+    ).batch_size(batch_size)
+    ids, texts, labels = [], [], []
+    async for complaint in cursor:
+        ids.append(complaint["_id"])
+        texts.append(complaint["description"])
+        value = int(complaint[label_field])
+        labels.append(1 - value if label_means == "spam" else value)
+        if len(texts) >= batch_size:
+            yield ids, texts, labels
+            ids, texts, labels = [], [], []
+    if texts:
+        yield ids, texts, labels
+
+
+async def train(args) -> dict:
+    vectorizer = make_vectorizer(args.n_features)
+    model = SGDClassifier(loss="log_loss", alpha=args.alpha, random_state=args.seed)
+    counts = {"train": 0, "holdout": 0, "spam": 0}
+    started = time.perf_counter()
+
+    for epoch in range(args.epochs):
+        async for ids, texts, labels in stream_batches(args.label_field, args.batch_size, args.label_means):
+            train_texts = [text for i, text in zip(ids, texts) if not is_holdout(i, args.holdout)]
+            train_labels = [label for i, label in zip(ids, labels) if not is_holdout(i, args.holdout)]
+            if not train_texts:
+                continue
+            model.partial_fit(vectorizer.transform(train_texts), train_labels, classes=CLASSES)
+            if epoch == 0:
+                counts["train"] += len(train_texts)
+                counts["spam"] += train_labels.count(0)
+        print(f"epoch {epoch + 1}/{args.epochs}: {counts['train']} complaints")
+
+    if counts["train"] == 0:
+        raise SystemExit(f"❌ No complaints with {args.label_field} set to 0 or 1")
+
+    # Score the held-out complaints, again one batch at a time; spam (0) is the positive class
+    correct = true_pos = false_pos = false_neg = 0
+    async for ids, texts, labels in stream_batches(args.label_field, args.batch_size, args.label_means):
+        holdout = [(text, label) for i, text, label in zip(ids, texts, labels) if is_holdout(i, args.holdout)]
+        if not holdout:
+            continue
+        predicted = model.predict(vectorizer.transform([text for text, _ in holdout]))
+        for (_, label), guess in zip(holdout, predicted):
+            counts["holdout"] += 1
+            correct += int(guess == label)
+            true_pos += int(guess == 0 and label == 0)
+            false_pos += int(guess == 0 and label == 1)
+            false_neg += int(guess == 1 and label == 0)
+
+    evaluation = {"holdout": counts["holdout"]}
+    if counts["holdout"]:
+        evaluation.update({
+            "accuracy": correct / counts["holdout"],
+            "precision": true_pos / (true_pos + false_pos) if true_pos + false_pos else None,
+            "recall": true_pos / (true_pos + false_neg) if true_pos + false_neg else None,
+        })
+    return {
+        "vectorizer": vectorizer,
+        "model": model,
+        "metadata": {
+            "label_field": args.label_field,
+            "label_means": args.label_means,
+            "epochs": args.epochs,
+            "n_features": args.n_features,
+            "alpha": args.alpha,
+            "trained": counts["train"],
+            "trained_spam": counts["spam"],
+            "evaluation": evaluation,
+            "training_seconds": round(time.perf_counter() - started, 3),
+        },
+    }
+
+
+def probe_agreement(vectorizer, model) -> float:
+    """Fraction of PROBE_TEXTS on which the new model and the served one agree"""
+    served = [label for label, _ in predictor.predict_batch(PROBE_TEXTS)]
+    trained = model.predict(vectorizer.transform(PROBE_TEXTS))
+    return sum(int(a == b) for a, b in zip(served, trained)) / len(PROBE_TEXTS)
+
+
+def save_artifact(vectorizer, model, metadata: dict, publish: bool) -> str:
+    """Write <version>.joblib/.json and optionally point CURRENT at it"""
+    version = "spam-" + datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    os.makedirs(predictor.PREDICTOR_MODEL_DIR, exist_ok=True)
+    # Same (vectorizer, model) pair format as the bundled model
+    joblib.dump((vectorizer, model), predictor.artifact_path(version))
+    metadata = {"version": version, "created_at": datetime.now(timezone.utc).isoformat(), **metadata}
+    with open(os.path.join(predictor.PREDICTOR_MODEL_DIR, f"{version}.json"), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+    if publish:
+        # Write-then-rename, so workers never read a half-written pointer
+        pointer = os.path.join(predictor.PREDICTOR_MODEL_DIR, predictor.CURRENT_POINTER)
+        with open(pointer + ".tmp", "w") as f:
+            f.write(version)
+        os.replace(pointer + ".tmp", pointer)
+    return version
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--label-field", default="spam_label", help="complaint field holding the 0/1 label")
+    parser.add_argument(
+        "--label-means", choices=["spam", "valid"], default="spam",
+        help="what a 1 in --label-field marks; valid matches the flag convention",
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--epochs", type=int, default=1)
+    parser.add_argument("--n-features", type=int, default=2 ** 20)
+    parser.add_argument("--alpha", type=float, default=1e-5, help="SGDClassifier regularisation strength")
+    parser.add_argument("--holdout", type=float, default=0.1, help="fraction of complaints kept for evaluation")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-publish", action="store_true", help="write the artifact but leave CURRENT alone")
+    args = parser.parse_args()
+
+    db.connect()
+    try:
+        result = await train(args)
+    finally:
+        db.close()
+    agreement = probe_agreement(result["vectorizer"], result["model"])
+    result["metadata"]["probe_agreement"] = agreement
+    publish = not args.no_publish and agreement > 0.5
+    version = save_artifact(result["vectorizer"], result["model"], result["metadata"], publish)
+    print(json.dumps({"version": version, **result["metadata"]}, indent=2))
+    print(f"✅ Saved {version}" + (" and published it as CURRENT" if publish else ""))
+    if not args.no_publish and not publish:
+        raise SystemExit(
+            f"❌ Not published: {version} agrees with the served model on only {agreement:.0%} "
+            f"of the probe texts; check --label-means"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
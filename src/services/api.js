@@ -0,0 +1,104 @@
+import { decodeMsgpack } from './msgpack';
+
+const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
+
+// Opt in to MessagePack list/stats responses: smaller and faster to parse than JSON.
+// gzip/brotli need no opt-in; the browser sends Accept-Encoding and decompresses itself.
+const USE_MSGPACK = process.env.REACT_APP_USE_MSGPACK === 'true';
+
+const MSGPACK_TYPE = 'application/msgpack';
+
+/**
+ * Call the backend and decode the response as MessagePack or JSON, whichever the server sent
+ * @param {string} path - API path, e.g. "/api/complaints"
+ * @param {Object} options - fetch options plus { params, msgpack, token }
+ * @returns {Promise<*>} Decoded response body
+ */
+export const request = async (path, { params, msgpack = USE_MSGPACK, token, headers = {}, ...options } = {}) => {
+  const url = new URL(path, API_BASE_URL);
+  Object.entries(params || {}).forEach(([key, value]) => {
+    if (value !== undefined && value !== null && value !== '') {
+      url.searchParams.set(key, value);
+    }
+  });
+
+  const response = await fetch(url, {
+    ...options,
+    headers: {
+      Accept: msgpack ? `${MSGPACK_TYPE}, application/json;q=0.9` : 'application/json',
+      ...(token ? { Authorization: `Bearer ${token}` } : {}),
+      ...headers
+    }
+  });
+
+  const contentType = response.headers.get('content-type') || '';
+  const body = contentType.startsWith(MSGPACK_TYPE)
+    ? decodeMsgpack(await response.arrayBuffer())
+    : await response.json();
+
+  if (!response.ok) {
+    const error = new Error(body?.detail || `Request failed with status ${response.status}`);
+    error.status = response.status;
+    error.retryAfter = response.headers.get('retry-after');
+    throw error;
+  }
+  return body;
+};
+
+const sendJSON = (method, path, data, token) => request(path, {
+  method,
+  token,
+  headers: { 'Content-Type': 'application/json' },
+  body: JSON.stringify(data)
+});
+
+/**
+ * Fetch one page of complaints
+ * @param {Object} params - limit, cursor, view ("full" | "summary"), fields, category, status, sort, ...
+ * @returns {Promise<{complaints: Array, next_cursor: ?string}>}
+ */
+export const getComplaints = (params = {}) => request('/api/complaints', { params });
+
+export const searchComplaints = (q, params = {}) => request('/api/complaints/search', { params: { q, ...params } });
+
+export const getNearbyComplaints = (lat, lng, radiusKm, params = {}) =>
+  request('/api/complaints/nearby', { params: { lat, lng, radius_km: radiusKm, ...params } });
+
+/**
+ * Dashboard totals (total, by_status, by_category) without downloading the list;
+ * complete is false while the server is still rebuilding them after a failure
+ * @returns {Promise<Object>}
+ */
+export const getComplaintStats = () => request('/api/complaints/stats');
+
+/**
+ * Map markers aggregated server-side into cells with counts and centroids
+ * @param {Array<number>} bbox - [minLng, minLat, maxLng, maxLat], e.g. map.getBounds().toBBoxString().split(',')
+ * @param {number} zoom - Current map zoom level
+ * @returns {Promise<{precision: number, total: number, clusters: Array}>}
+ */
+export const getComplaintClusters = (bbox, zoom) =>
+  request('/api/complaints/clusters', { params: { bbox: bbox.join(','), zoom } });
+
+export const raiseComplaint = (complaint) => sendJSON('POST', '/api/complaints', complaint);
+
+// Signed-in users only; the vote is counted for the token's owner
+export const upvoteComplaint = (complaintId, token) =>
+  request(`/api/complaints/${complaintId}/upvote`, { method: 'POST', token });
+
+// Admins only; token is the signed-in user's access token
+export const updateComplaintStatus = (complaintId, status, token) =>
+  sendJSON('PATCH', `/api/complaints/${complaintId}/status`, { status }, token);
+
+/**
+ * Subscribe to live complaint events (always JSON; EventSource can't negotiate formats)
+ * @param {Object} handlers - { onComplaint, onStatus, onError }
+ * @returns {Function} Call to close the subscription
+ */
+export const subscribeToComplaints = ({ onComplaint, onStatus, onError } = {}) => {
+  const source = new EventSource(new URL('/api/complaints/stream', API_BASE_URL));
+  if (onComplaint) source.addEventListener('complaint', (event) => onComplaint(JSON.parse(event.data)));
+  if (onStatus) source.addEventListener('status', (event) => onStatus(JSON.parse(event.data)));
+  if (onError) source.onerror = onError;
+  return () => source.close();
+};
@@ -0,0 +1,126 @@
+/**
+ * Minimal MessagePack decoder for API responses.
+ * Covers every type the backend emits (nil, bool, ints, floats, str, bin, array, map);
+ * extension types are returned as { type, data }.
+ * @param {ArrayBuffer|Uint8Array} buffer - Encoded MessagePack bytes
+ * @returns {*} Decoded value
+ */
+export const decodeMsgpack = (buffer) => {
+  const bytes = buffer instanceof Uint8Array ? buffer : new Uint8Array(buffer);
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+  const textDecoder = new TextDecoder();
+  let offset = 0;
+
+  const readString = (length) => {
+    const value = textDecoder.decode(bytes.subarray(offset, offset + length));
+    offset += length;
+    return value;
+  };
+
+  const readBinary = (length) => {
+    const value = bytes.slice(offset, offset + length);
+    offset += length;
+    return value;
+  };
+
+  const readArray = (length) => {
+    const value = new Array(length);
+    for (let i = 0; i < length; i++) {
+      value[i] = read();
+    }
+    return value;
+  };
+
+  const readMap = (length) => {
+    const value = {};
+    for (let i = 0; i < length; i++) {
+      const key = read();
+      value[key] = read();
+    }
+    return value;
+  };
+
+  const readExt = (length) => {
+    const type = view.getInt8(offset);
+    offset += 1;
+    return { type, data: readBinary(length) };
+  };
+
+  // Read a big-endian unsigned/signed integer of the given byte width
+  const readUint = (width) => {
+    let value;
+    if (width === 1) value = view.getUint8(offset);
+    else if (width === 2) value = view.getUint16(offset);
+    else if (width === 4) value = view.getUint32(offset);
+    else value = Number(view.getBigUint64(offset));
+    offset += width;
+    return value;
+  };
+
+  const readInt = (width) => {
+    let value;
+    if (width === 1) value = view.getInt8(offset);
+    else if (width === 2) value = view.getInt16(offset);
+    else if (width === 4) value = view.getInt32(offset);
+    else value = Number(view.getBigInt64(offset));
+    offset += width;
+    return value;
+  };
+
+  const read = () => {
+    const byte = view.getUint8(offset);
+    offset += 1;
+
+    if (byte <= 0x7f) return byte; // positive fixint
+    if (byte >= 0xe0) return byte - 0x100; // negative fixint
+    if (byte >= 0x80 && byte <= 0x8f) return readMap(byte & 0x0f);
+    if (byte >= 0x90 && byte <= 0x9f) return readArray(byte & 0x0f);
+    if (byte >= 0xa0 && byte <= 0xbf) return readString(byte & 0x1f);
+
+    switch (byte) {
+      case 0xc0: return null;
+      case 0xc2: return false;
+      case 0xc3: return true;
+      case 0xc4: return readBinary(readUint(1));
+      case 0xc5: return readBinary(readUint(2));
+      case 0xc6: return readBinary(readUint(4));
+      case 0xc7: return readExt(readUint(1));
+      case 0xc8: return readExt(readUint(2));
+      case 0xc9: return readExt(readUint(4));
+      case 0xca: {
+        const value = view.getFloat32(offset);
+        offset += 4;
+        return value;
+      }
+      case 0xcb: {
+        const value = view.getFloat64(offset);
+        offset += 8;
+        return value;
+      }
+      case 0xcc: return readUint(1);
+      case 0xcd: return readUint(2);
+      case 0xce: return readUint(4);
+      case 0xcf: return readUint(8);
+      case 0xd0: return readInt(1);
+      case 0xd1: return readInt(2);
+      case 0xd2: return readInt(4);
+      case 0xd3: return readInt(8);
+      case 0xd4: return readExt(1);
+      case 0xd5: return readExt(2);
+      case 0xd6: return readExt(4);
+      case 0xd7: return readExt(8);
+      case 0xd8: return readExt(16);
+      case 0xd9: return readString(readUint(1));
+      case 0xda: return readString(readUint(2));
+      case 0xdb: return readString(readUint(4));
+      case 0xdc: return readArray(readUint(2));
+      case 0xdd: return readArray(readUint(4));
+      case 0xde: return readMap(readUint(2));
+      case 0xdf: return readMap(readUint(4));
+      default:
+        throw new Error(`Invalid MessagePack byte 0x${byte.toString(16)} at offset ${offset - 1}`);
+    }
+  };
+
+  return read();
+};